@@ -0,0 +1,3 @@
+#!/bin/sh
+# autorise le service db-replica à se répliquer depuis db (docker-compose.yml)
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -1,6 +1,9 @@
 # pour la recherche de pays avec pycountry
 # il contient la base de données ISO de tous les pays du monde
+import functools
 import gettext
+import unicodedata
+
 import pycountry
 
 # traduction française intégrée à pycountry
@@ -14,48 +17,96 @@ EXTRA_ALIASES = {
 }
 
 
+def _country_names(country):
+    code = country.alpha_2
+    names = [code.lower()]
+    # nom en anglais
+    names.append(country.name.lower())
+    # nom en français (traduction automatique)
+    french_name = french.gettext(country.name)
+    if french_name != country.name:
+        names.append(french_name.lower())
+    # nom courant si différent
+    if hasattr(country, "common_name"):
+        names.append(country.common_name.lower())
+        french_common = french.gettext(country.common_name)
+        if french_common != country.common_name:
+            names.append(french_common.lower())
+    if hasattr(country, "official_name"):
+        names.append(country.official_name.lower())
+    names.extend(EXTRA_ALIASES.get(code, []))
+    # sans doublons, dans l'ordre
+    return tuple(dict.fromkeys(names))
+
+
+@functools.cache
+def _country_index():
+    """
+    Table des pays construite une seule fois par processus :
+    code -> noms, et alias normalisé -> codes.
+    """
+    names_by_code = {}
+    codes_by_alias = {}
+    for country in pycountry.countries:
+        names = _country_names(country)
+        names_by_code[country.alpha_2] = names
+        for name in names:
+            codes_by_alias.setdefault(normalize_search_text(name), set()).add(country.alpha_2)
+    return names_by_code, {alias: frozenset(codes) for alias, codes in codes_by_alias.items()}
+
+
 def get_country_search_names(code):
     code = code.upper()
-    names = [code.lower()]
-    
-    country = pycountry.countries.get(alpha_2=code)
-    if country:
-        # nom en anglais
-        names.append(country.name.lower())
-        # nom en français (traduction automatique)
-        french_name = french.gettext(country.name)
-        if french_name != country.name:
-            names.append(french_name.lower())
-        # nom courant si différent
-        if hasattr(country, "common_name"):
-            names.append(country.common_name.lower())
-            french_common = french.gettext(country.common_name)
-            if french_common != country.common_name:
-                names.append(french_common.lower())
-        if hasattr(country, "official_name"):
-            names.append(country.official_name.lower())
-    
-    if code in EXTRA_ALIASES:
-        names.extend(EXTRA_ALIASES[code])
-    
-    return names
+    names = _country_index()[0].get(code)
+    if names is None:
+        return [code.lower(), *EXTRA_ALIASES.get(code, [])]
+    return list(names)
+
+
+def resolve_country_codes(alias):
+    """Codes ISO correspondant à un nom ou alias ("allemagne" -> {"DE"})."""
+    return _country_index()[1].get(normalize_search_text(alias.strip()), frozenset())
 
 
 def get_all_country_codes():
     """Retourne l'ensemble de tous les codes ISO alpha-2 valides (250+ pays)."""
-    return {country.alpha_2 for country in pycountry.countries}
+    return set(_country_index()[0])
 
 
-def get_country_choices():
-    """
-    Retourne une liste de tuples (code, nom en français) pour les formulaires.
-    """
+@functools.cache
+def _sorted_country_choices():
     choices = []
     for country in pycountry.countries:
         name = getattr(country, "common_name", None) or country.name
         # traduit en français
         french_name = french.gettext(name)
         choices.append((country.alpha_2, french_name))
-    
+
     choices.sort(key=lambda x: x[1])
-    return choices
+    return tuple(choices)
+
+
+def get_country_choices():
+    """
+    Retourne une liste de tuples (code, nom en français) pour les formulaires.
+    """
+    return list(_sorted_country_choices())
+
+
+def normalize_search_text(value):
+    """Minuscules sans accents, pour comparer "Évry" et "evry"."""
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def build_location_search(location, country_code):
+    """
+    Texte indexé pour le filtre lieu d'une offre : le lieu de l'offre
+    et tous les noms connus du pays de l'organisation.
+    """
+    parts = []
+    if location:
+        parts.append(location)
+    if country_code:
+        parts.extend(get_country_search_names(country_code))
+    return normalize_search_text(" ".join(parts))
@@ -1,12 +1,26 @@
 import base64
+import hashlib
+import threading
+import time
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
+from django.core.mail.backends.base import BaseEmailBackend
 from django.core.mail.backends.smtp import EmailBackend
 from django.core.mail.utils import DNS_NAME
 
+from accounts.spool import spool_messages
+
+# access tokens du processus : clé -> (token, expiration en timestamp)
+_tokens = {}
+# un seul renouvellement à la fois : les open() concurrents attendent le token au lieu de tous appeler Google
+_token_lock = threading.Lock()
+
 """Pour envoyer des mails avec gmail en oauth2
-On demande un access token à Google
+On demande un access token à Google (gardé jusqu'à son expiration,
+moins GMAIL_TOKEN_MARGIN secondes, et partagé entre workers via le cache
+Django si GMAIL_TOKEN_SHARED_CACHE)
 Puis on se connecte au server smtp.
 """
 class GmailOAuth2Backend(EmailBackend):
@@ -18,16 +32,66 @@ class GmailOAuth2Backend(EmailBackend):
             return False
 
         access_token = self._get_access_token()
-        self._login_with_token(access_token)
+        try:
+            self._login_with_token(access_token)
+        except RuntimeError:
+            # token révoqué avant son expiration : le prochain open en redemande un
+            self._forget_access_token()
+            raise
         return True
 
-    def _get_access_token(self) -> str:
+    def _credentials(self) -> tuple[str, str, str]:
         client_id = getattr(settings, "GMAIL_CLIENT_ID", "")
         client_secret = getattr(settings, "GMAIL_CLIENT_SECRET", "")
         refresh_token = getattr(settings, "GMAIL_REFRESH_TOKEN", "")
 
         if not client_id or not client_secret or not refresh_token:
             raise RuntimeError("Google OAuth2: renseigne les variables GMAIL_* dans settings.")
+        return client_id, client_secret, refresh_token
+
+    def _token_key(self) -> str:
+        client_id, _, refresh_token = self._credentials()
+        digest = hashlib.sha256(f"{client_id}:{refresh_token}".encode()).hexdigest()[:16]
+        return f"gmail-oauth:{digest}"
+
+    def _cached_token(self, key: str) -> str | None:
+        margin = getattr(settings, "GMAIL_TOKEN_MARGIN", 300)
+        entry = _tokens.get(key)
+        if entry is None and getattr(settings, "GMAIL_TOKEN_SHARED_CACHE", False):
+            entry = cache.get(key)
+        if entry is None or entry[1] - margin <= time.time():
+            return None
+        _tokens[key] = entry
+        return entry[0]
+
+    def _get_access_token(self) -> str:
+        key = self._token_key()
+        token = self._cached_token(key)
+        if token:
+            return token
+        with _token_lock:
+            # renouvelé par un autre thread pendant l'attente du verrou
+            token = self._cached_token(key)
+            if token:
+                return token
+            token, expires_in = self._request_access_token()
+            margin = getattr(settings, "GMAIL_TOKEN_MARGIN", 300)
+            if expires_in > margin:
+                entry = (token, time.time() + expires_in)
+                _tokens[key] = entry
+                if getattr(settings, "GMAIL_TOKEN_SHARED_CACHE", False):
+                    cache.set(key, entry, timeout=expires_in - margin)
+        return token
+
+    def _forget_access_token(self) -> None:
+        key = self._token_key()
+        _tokens.pop(key, None)
+        if getattr(settings, "GMAIL_TOKEN_SHARED_CACHE", False):
+            cache.delete(key)
+
+    def _request_access_token(self) -> tuple[str, int]:
+        client_id, client_secret, refresh_token = self._credentials()
+        token_url = getattr(settings, "GMAIL_TOKEN_URL", self.token_url)
 
         payload = {
             "client_id": client_id,
@@ -37,7 +101,7 @@ class GmailOAuth2Backend(EmailBackend):
         }
 
         try:
-            response = requests.post(self.token_url, data=payload, timeout=10)
+            response = requests.post(token_url, data=payload, timeout=10)
             response.raise_for_status()
         except requests.RequestException as exc:
             raise RuntimeError("Google OAuth2: impossible d’obtenir un access token.") from exc
@@ -46,7 +110,8 @@ class GmailOAuth2Backend(EmailBackend):
         token = data.get("access_token")
         if not token:
             raise RuntimeError("Google OAuth2: la réponse ne contient pas d’access_token.")
-        return token
+        # sans durée annoncée, le token n'est pas gardé
+        return token, int(data.get("expires_in") or 0)
 
     def _login_with_token(self, token: str) -> None:
         if not self.connection:
@@ -62,3 +127,20 @@ class GmailOAuth2Backend(EmailBackend):
         if code != 235:
             text = response.decode("utf-8", errors="ignore")
             raise RuntimeError(f"Google OAuth2: XOAUTH2 a échoué ({code} {text}).")
+
+
+class SpoolBackend(BaseEmailBackend):
+    """Met les messages en file (accounts.OutboundEmail) ; `manage.py run_mail_dispatcher` les envoie."""
+
+    # lu par accounts.mail.send_mass_messages et invitations.imports
+    spools = True
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        try:
+            return len(spool_messages(email_messages))
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
@@ -0,0 +1,143 @@
+"""Envoi groupé d'emails sur une seule connexion du backend.
+
+send_mail ouvre une connexion par message : avec GmailOAuth2Backend,
+chaque appel refait TLS, la demande de token OAuth et XOAUTH2. Ici la
+connexion est ouverte une fois pour tout le lot ; elle n'est rouverte
+qu'après une erreur de connexion, au plus EMAIL_BATCH_MAX_RECONNECTS fois
+par paquet de EMAIL_BATCH_SIZE messages : au-delà, le reste du paquet est
+compté en échec sans nouvelle tentative. Un refus du serveur pour un
+message (destinataire, expéditeur ou contenu) ne compte que ce message en
+échec, sur la même connexion. Un backend qui met en file (SpoolBackend)
+reçoit tout le lot en un appel.
+
+send_in_background envoie un message depuis un pool de threads borné,
+sans faire attendre la requête HTTP ; son état (en cours, envoyé, échec)
+est gardé dans le cache default pour être affiché à l'utilisateur, qui doit
+donc être partagé entre les workers (voir CACHES). À l'arrêt normal du
+processus, les messages en attente sont encore envoyés ; un processus tué
+les perd, et leur état "en cours" expire après EMAIL_BACKGROUND_PENDING_TIMEOUT
+secondes pour devenir inconnu plutôt que de rester en cours.
+"""
+import contextlib
+import logging
+import smtplib
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# erreurs SMTP qui ne concernent que le message envoyé : le réessayer ne servirait à rien
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+def send_mass_messages(messages, connection=None):
+    """Envoie les EmailMessage `messages` ; retourne les (message, erreur) de ceux qui n'ont pas pu partir."""
+    connection = connection or get_connection()
+    if getattr(connection, "spools", False):
+        # aucune connexion réseau : une seule écriture pour tout le lot
+        connection.send_messages(messages)
+        return []
+    failed = []
+    batch_size = settings.EMAIL_BATCH_SIZE
+    try:
+        for start in range(0, len(messages), batch_size):
+            reconnects = 0
+            for message in messages[start : start + batch_size]:
+                if reconnects > settings.EMAIL_BATCH_MAX_RECONNECTS:
+                    failed.append((message, "non envoyé : serveur injoignable"))
+                    continue
+                while True:
+                    try:
+                        # sans effet si la connexion est déjà ouverte
+                        connection.open()
+                        if not connection.send_messages([message]):
+                            failed.append((message, "refusé par le backend"))
+                        break
+                    except MESSAGE_ERRORS as exc:
+                        # refus propre à ce message : la connexion reste utilisable
+                        logger.warning("Email refusé pour %s", ", ".join(message.recipients()), exc_info=True)
+                        failed.append((message, f"{type(exc).__name__}: {exc}"))
+                        break
+                    except Exception as exc:
+                        logger.warning("Envoi impossible à %s", ", ".join(message.recipients()), exc_info=True)
+                        _close(connection)
+                        reconnects += 1
+                        if reconnects > settings.EMAIL_BATCH_MAX_RECONNECTS:
+                            failed.append((message, f"{type(exc).__name__}: {exc}"))
+                            break
+    finally:
+        _close(connection)
+    return failed
+
+
+def _close(connection):
+    # une connexion déjà rompue peut échouer au QUIT : elle est abandonnée de toute façon
+    with contextlib.suppress(Exception):
+        connection.close()
+
+
+DELIVERY_PENDING = "pending"
+DELIVERY_SENT = "sent"
+DELIVERY_FAILED = "failed"
+# id de la session absent du cache : expiré, perdu avec son processus ou cache non partagé
+DELIVERY_UNKNOWN = "unknown"
+
+# plus longtemps que la validité d'un code 2FA (10 minutes)
+DELIVERY_TIMEOUT = 15 * 60
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = settings.EMAIL_BACKGROUND_WORKERS
+            # threads occupés + messages en attente : au-delà, l'envoi est refusé plutôt qu'empilé
+            slots = threading.BoundedSemaphore(workers + settings.EMAIL_BACKGROUND_QUEUE)
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mail"), slots
+        return _pool
+
+
+def _delivery_key(delivery_id):
+    return f"mail-delivery:{delivery_id}"
+
+
+def delivery_status(delivery_id):
+    """État d'un envoi de send_in_background, DELIVERY_UNKNOWN s'il n'est plus dans le cache, None sans envoi."""
+    if not delivery_id:
+        return None
+    return cache.get(_delivery_key(delivery_id), DELIVERY_UNKNOWN)
+
+
+def send_in_background(message):
+    """Confie `message` au pool d'envoi et retourne l'id à passer à delivery_status."""
+    delivery_id = uuid.uuid4().hex
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        logger.warning("File d'envoi pleine, email pour %s non envoyé", ", ".join(message.recipients()))
+        cache.set(_delivery_key(delivery_id), DELIVERY_FAILED, DELIVERY_TIMEOUT)
+        return delivery_id
+    cache.set(_delivery_key(delivery_id), DELIVERY_PENDING, settings.EMAIL_BACKGROUND_PENDING_TIMEOUT)
+    future = executor.submit(_deliver, delivery_id, message)
+    future.add_done_callback(lambda _: slots.release())
+    return delivery_id
+
+
+def _deliver(delivery_id, message):
+    try:
+        sent = message.send()
+    except Exception:
+        logger.warning("Envoi impossible à %s", ", ".join(message.recipients()), exc_info=True)
+        sent = 0
+    finally:
+        # connexions à la base ouvertes par ce thread (SpoolBackend) : la requête ne les fermera pas
+        connections.close_all()
+    cache.set(_delivery_key(delivery_id), DELIVERY_SENT if sent else DELIVERY_FAILED, DELIVERY_TIMEOUT)
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accounts.spool import dispatch_pending
+
+
+class Command(BaseCommand):
+    help = "Envoie les emails mis en file par SpoolBackend (plusieurs dispatchers peuvent tourner en parallèle)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=2.0, help="Secondes entre deux relevés de la file.")
+        parser.add_argument("--once", action="store_true", help="Envoyer les emails dus puis s'arrêter.")
+
+    def handle(self, *args, interval, once, **options):
+        while True:
+            sent, retried, dead = dispatch_pending()
+            if sent or retried or dead:
+                self.stdout.write(f"{sent} envoyé(s), {retried} replanifié(s), {dead} abandonné(s).")
+            if once:
+                return
+            time.sleep(interval)
+            # connexion fermée ou trop ancienne entre deux relevés : Django en rouvre une
+            close_old_connections()
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:11
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import UnaccentExtension
+from django.db import migrations
+
+# configuration française qui ignore les accents ("developpeur" == "développeur")
+CREATE_SEARCH_CONFIG = """
+CREATE TEXT SEARCH CONFIGURATION french_unaccent ( COPY = french );
+ALTER TEXT SEARCH CONFIGURATION french_unaccent
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+"""
+
+DROP_SEARCH_CONFIG = "DROP TEXT SEARCH CONFIGURATION IF EXISTS french_unaccent;"
+
+# remplissage des offres existantes, même calcul que offers.search.offer_search_vector
+BACKFILL_SEARCH_VECTOR = """
+UPDATE accounts_offer AS offer SET search_vector = to_tsvector(
+    'french_unaccent'::regconfig,
+    COALESCE(offer.title, '') || ' ' ||
+    COALESCE(offer.skills, '') || ' ' ||
+    COALESCE(offer.contract_type, '') || ' ' ||
+    COALESCE(
+        (SELECT organisation_name FROM accounts_companyprofile WHERE user_id = offer.company_id),
+        (SELECT organisation_name FROM accounts_institutionprofile WHERE user_id = offer.company_id),
+        ''
+    ) || ' ' ||
+    COALESCE(offer.description, '')
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_alter_offer_company'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        migrations.RunSQL(CREATE_SEARCH_CONFIG, DROP_SEARCH_CONFIG),
+        migrations.AddField(
+            model_name='offer',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='offer',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='offer_search_vector_idx'),
+        ),
+        migrations.RunSQL(BACKFILL_SEARCH_VECTOR, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:12
+
+import gettext
+import unicodedata
+
+import django.contrib.postgres.indexes
+import pycountry
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# copie figée de accounts.countries au moment de la migration : le module peut évoluer
+# sans changer ce que calcule (ou importe) une migration déjà appliquée ailleurs
+EXTRA_ALIASES = {
+    "US": ["usa", "amérique"],
+    "GB": ["uk", "angleterre"],
+    "AE": ["dubai", "émirats"],
+}
+
+
+def country_search_names(code):
+    french = gettext.translation('iso3166-1', pycountry.LOCALES_DIR, languages=['fr'])
+    code = code.upper()
+    names = [code.lower()]
+    country = pycountry.countries.get(alpha_2=code)
+    if country:
+        names.append(country.name.lower())
+        french_name = french.gettext(country.name)
+        if french_name != country.name:
+            names.append(french_name.lower())
+        if hasattr(country, "common_name"):
+            names.append(country.common_name.lower())
+            french_common = french.gettext(country.common_name)
+            if french_common != country.common_name:
+                names.append(french_common.lower())
+        if hasattr(country, "official_name"):
+            names.append(country.official_name.lower())
+    names.extend(EXTRA_ALIASES.get(code, []))
+    return names
+
+
+def normalize_search_text(value):
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def build_location_search(location, country_code):
+    parts = []
+    if location:
+        parts.append(location)
+    if country_code:
+        parts.extend(country_search_names(country_code))
+    return normalize_search_text(" ".join(parts))
+
+
+def fill_location_search(apps, schema_editor):
+    Offer = apps.get_model("accounts", "Offer")
+    CompanyProfile = apps.get_model("accounts", "CompanyProfile")
+    InstitutionProfile = apps.get_model("accounts", "InstitutionProfile")
+    countries = dict(InstitutionProfile.objects.values_list("user_id", "country_code"))
+    countries.update(CompanyProfile.objects.values_list("user_id", "country_code"))
+    offers = list(Offer.objects.only("id", "location", "company_id"))
+    for offer in offers:
+        offer.location_search = build_location_search(offer.location, countries.get(offer.company_id, ""))
+    Offer.objects.bulk_update(offers, ["location_search"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_offer_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='offer',
+            name='location_search',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='offer',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['location_search'], name='offer_location_search_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(fill_location_search, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_offer_cards(apps, schema_editor):
+    Offer = apps.get_model("accounts", "Offer")
+    OfferCard = apps.get_model("accounts", "OfferCard")
+    CompanyProfile = apps.get_model("accounts", "CompanyProfile")
+    InstitutionProfile = apps.get_model("accounts", "InstitutionProfile")
+    profiles = {profile.user_id: profile for profile in InstitutionProfile.objects.all()}
+    profiles.update({profile.user_id: profile for profile in CompanyProfile.objects.all()})
+    cards = []
+    for offer in Offer.objects.all().iterator():
+        profile = profiles.get(offer.company_id)
+        cards.append(OfferCard(
+            offer_id=offer.pk,
+            title=offer.title,
+            contract_type=offer.contract_type,
+            location=offer.location,
+            duration=offer.duration,
+            remote=offer.remote,
+            created_at=offer.created_at,
+            organisation_name=profile.organisation_name if profile else "",
+            organisation_description=profile.description if profile else "",
+            logo_url=profile.logo.url if profile and profile.logo else "",
+            country_code=profile.country_code if profile else "",
+        ))
+    OfferCard.objects.bulk_create(cards, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_offer_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfferCard',
+            fields=[
+                ('offer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='accounts.offer')),
+                ('title', models.CharField(max_length=255)),
+                ('contract_type', models.CharField(choices=[('stage', 'Stage'), ('alternance', 'Alternance')], max_length=20)),
+                ('location', models.CharField(max_length=255)),
+                ('duration', models.CharField(blank=True, max_length=50)),
+                ('remote', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('organisation_name', models.CharField(blank=True, max_length=255)),
+                ('organisation_description', models.TextField(blank=True)),
+                ('logo_url', models.CharField(blank=True, max_length=500)),
+                ('country_code', models.CharField(blank=True, max_length=10)),
+            ],
+        ),
+        migrations.RunPython(build_offer_cards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:15
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_offercard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='offer',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='offer_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='offer',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['skills'], name='offer_skills_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='offercard',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['organisation_name'], name='offercard_org_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:18
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# les cartes existantes reprennent les dates de leur offre et de leur organisation
+BACKFILL_CARD_DATES = """
+UPDATE accounts_offercard AS card SET
+    updated_at = offer.updated_at,
+    organisation_updated_at = COALESCE(
+        (SELECT updated_at FROM accounts_companyprofile WHERE user_id = offer.company_id),
+        (SELECT updated_at FROM accounts_institutionprofile WHERE user_id = offer.company_id)
+    )
+FROM accounts_offer AS offer
+WHERE offer.id = card.offer_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_offer_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companyprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='institutionprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='offercard',
+            name='organisation_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='offercard',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(BACKFILL_CARD_DATES, migrations.RunSQL.noop),
+    ]
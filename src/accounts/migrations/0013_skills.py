@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:22
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+MAX_SKILL_LENGTH = 100
+
+
+# découpage des compétences tel qu'il était dans accounts.skills à l'écriture de cette migration
+def skill_key(label):
+    decomposed = unicodedata.normalize("NFKD", label.lower())
+    key = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return re.sub(r"\s+", " ", key).strip()[:MAX_SKILL_LENGTH]
+
+
+def parse_skills(text):
+    skills = {}
+    for label in (text or "").split(","):
+        label = re.sub(r"\s+", " ", label).strip()[:MAX_SKILL_LENGTH]
+        key = skill_key(label)
+        if key:
+            skills.setdefault(key, label)
+    return skills
+
+
+def fill_skills(apps, schema_editor):
+    Offer = apps.get_model("accounts", "Offer")
+    Skill = apps.get_model("accounts", "Skill")
+    OfferSkill = apps.get_model("accounts", "OfferSkill")
+    offer_skills = {offer_id: parse_skills(skills) for offer_id, skills in Offer.objects.values_list("id", "skills")}
+    labels, counts = {}, {}
+    for skills in offer_skills.values():
+        for key, label in skills.items():
+            labels.setdefault(key, label)
+            counts[key] = counts.get(key, 0) + 1
+    Skill.objects.bulk_create(
+        [Skill(name=key, label=label, offer_count=counts[key]) for key, label in labels.items()],
+        batch_size=1000,
+    )
+    skill_ids = dict(Skill.objects.values_list("name", "id"))
+    OfferSkill.objects.bulk_create(
+        [
+            OfferSkill(offer_id=offer_id, skill_id=skill_ids[key])
+            for offer_id, skills in offer_skills.items()
+            for key in skills
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('label', models.CharField(max_length=100)),
+                ('offer_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OfferSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offer_skills', to='accounts.offer')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offer_skills', to='accounts.skill')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='skill_tags',
+            field=models.ManyToManyField(blank=True, related_name='offers', through='accounts.OfferSkill', to='accounts.skill'),
+        ),
+        migrations.AddIndex(
+            model_name='offerskill',
+            index=models.Index(fields=['skill', 'offer'], name='offerskill_skill_offer_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='offerskill',
+            constraint=models.UniqueConstraint(fields=('offer', 'skill'), name='offerskill_offer_skill_unique'),
+        ),
+        migrations.RunPython(fill_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+# même calcul que offers.search.offer_search_vector : titre (A) > compétences (B) > organisation (C) > reste (D)
+WEIGHTED_SEARCH_VECTOR = """
+UPDATE accounts_offer AS offer SET search_vector =
+    setweight(to_tsvector('french_unaccent'::regconfig, COALESCE(offer.title, '')), 'A') ||
+    setweight(to_tsvector('french_unaccent'::regconfig, COALESCE(offer.skills, '')), 'B') ||
+    setweight(to_tsvector('french_unaccent'::regconfig, COALESCE(
+        (SELECT organisation_name FROM accounts_companyprofile WHERE user_id = offer.company_id),
+        (SELECT organisation_name FROM accounts_institutionprofile WHERE user_id = offer.company_id),
+        ''
+    )), 'C') ||
+    setweight(to_tsvector('french_unaccent'::regconfig,
+        COALESCE(offer.contract_type, '') || ' ' || COALESCE(offer.description, '')
+    ), 'D');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_offer_coordinates'),
+    ]
+
+    operations = [
+        migrations.RunSQL(WEIGHTED_SEARCH_VECTOR, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,34 @@
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_offer_updated_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvitationImport',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminé'), ('failed', 'Erreur')], default='pending', max_length=16)),
+                ('rows', models.JSONField(default=list)),
+                ('base_url', models.CharField(max_length=255)),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('institution', models.ForeignKey(limit_choices_to={'role': 'institution'}, on_delete=django.db.models.deletion.CASCADE, related_name='invitation_imports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='invitationimport_queue_idx')],
+            },
+        ),
+    ]
@@ -1,7 +1,10 @@
 import uuid
 
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
@@ -17,6 +20,12 @@ class User(AbstractUser):
     role = models.CharField(max_length=32, choices=Role.choices, default=Role.STUDENT)
     is_verified = models.BooleanField(default=False)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # comparaison des emails sans la casse (imports d'invitations, voir invitations.imports)
+            models.Index(Lower("email"), name="user_email_lower_idx"),
+        ]
+
 
 class StudentProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="student_profile")
@@ -49,6 +58,7 @@ class CompanyProfile(models.Model):
     logo = models.ImageField(upload_to="company_logos/", blank=True, null=True)
     is_approved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return f"Profil entreprise {self.organisation_name or self.user.email}"
@@ -65,6 +75,7 @@ class InstitutionProfile(models.Model):
     logo = models.ImageField(upload_to="institution_logos/", blank=True, null=True)
     is_approved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return f"Profil établissement {self.organisation_name or self.user.email}"
@@ -98,6 +109,14 @@ class StudentInvitation(models.Model):
     used_at = models.DateTimeField(null=True, blank=True)
     error_message = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # import CSV qui l'a créée : un import repris renvoie ses propres invitations non envoyées
+    import_job = models.ForeignKey(
+        "InvitationImport",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="invitations",
+    )
 
     class Meta:
         indexes = [
@@ -122,6 +141,87 @@ class StudentInvitation(models.Model):
         self.save(update_fields=["status", "used_at"])
 
 
+class InvitationImport(models.Model):
+    """Import CSV d'invitations, traité hors requête par `manage.py run_invitation_worker`."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "En attente"
+        RUNNING = "running", "En cours"
+        DONE = "done", "Terminé"
+        FAILED = "failed", "Erreur"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    institution = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="invitation_imports",
+        limit_choices_to={"role": User.Role.INSTITUTION},
+    )
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    # lignes du CSV, colonnes attendues uniquement
+    rows = models.JSONField(default=list)
+    # racine du site au moment de l'import, pour les liens des emails
+    base_url = models.CharField(max_length=255)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # file d'attente du worker (SELECT ... FOR UPDATE SKIP LOCKED)
+            models.Index(fields=["status", "created_at"], name="invitationimport_queue_idx"),
+        ]
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.Status.DONE, self.Status.FAILED)
+
+    @property
+    def report(self) -> dict:
+        return {"sent": self.sent, "failed": self.failed, "errors": self.errors}
+
+
+class OutboundEmail(models.Model):
+    """Email mis en file par SpoolBackend, envoyé par `manage.py run_mail_dispatcher`."""
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "En file"
+        SENT = "sent", "Envoyé"
+        DEAD = "dead", "Abandonné"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
+    subject = models.TextField()
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list)
+    bcc = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list)
+    headers = models.JSONField(default=dict)
+    # [contenu, type MIME] des EmailMultiAlternatives
+    alternatives = models.JSONField(default=list)
+    # invitation dont le statut suit l'envoi réel
+    invitation = models.ForeignKey(
+        StudentInvitation, on_delete=models.SET_NULL, null=True, blank=True, related_name="emails"
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    # repoussé pendant l'envoi : un lot laissé par un dispatcher arrêté repart à l'expiration
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # file du dispatcher (SELECT ... FOR UPDATE SKIP LOCKED)
+            models.Index(fields=["status", "next_attempt_at"], name="outboundemail_queue_idx"),
+        ]
+
+
 class Offer(models.Model):
     class ContractType(models.TextChoices):
         STAGE = "stage", "Stage"
@@ -140,6 +240,118 @@ class Offer(models.Model):
     duration = models.CharField(max_length=50, blank=True)
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # maintenu par offers.signals, voir offers.search
+    search_vector = SearchVectorField(null=True, editable=False)
+    # lieu + noms du pays de l'organisation, normalisés (voir countries.build_location_search)
+    location_search = models.TextField(blank=True, editable=False)
+    # coordonnées du lieu d'après le gazetteer (City), voir offers.geo
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+    # compétences de `skills` découpées et normalisées, voir offers.skills
+    skill_tags = models.ManyToManyField("Skill", through="OfferSkill", related_name="offers", blank=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="offer_search_vector_idx"),
+            GinIndex(fields=["location_search"], name="offer_location_search_idx", opclasses=["gin_trgm_ops"]),
+            # pagination par curseur de la liste publique (offers.pagination)
+            models.Index(fields=["-created_at", "id"], name="offer_created_at_id_idx"),
+            # recherche approchée (fautes de frappe), voir offers.search.fuzzy_search_offers
+            GinIndex(fields=["title"], name="offer_title_trgm_idx", opclasses=["gin_trgm_ops"]),
+            GinIndex(fields=["skills"], name="offer_skills_trgm_idx", opclasses=["gin_trgm_ops"]),
+            # rectangle englobant de la recherche par rayon (offers.geo.filter_near)
+            models.Index(fields=["latitude", "longitude"], name="offer_lat_lng_idx"),
+            # synchronisation par différence de l'API (?updated_since=, offers.api)
+            models.Index(fields=["updated_at", "id"], name="offer_updated_at_id_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
+
+
+class City(models.Model):
+    """Ville du gazetteer hors ligne GeoNames, chargée par la commande load_gazetteer."""
+
+    geoname_id = models.PositiveIntegerField(primary_key=True)
+    name = models.CharField(max_length=200)
+    # nom normalisé (countries.normalize_search_text) pour la recherche exacte
+    search_name = models.CharField(max_length=200)
+    country_code = models.CharField(max_length=2, blank=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    population = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["search_name", "-population"], name="city_search_name_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class Skill(models.Model):
+    """Compétence normalisée (voir accounts.skills), partagée entre les offres."""
+
+    name = models.CharField(max_length=100, unique=True)
+    label = models.CharField(max_length=100)
+    # nombre d'offres qui demandent la compétence, tenu à jour par offers.skills
+    offer_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return self.label
+
+
+class OfferSkill(models.Model):
+    offer = models.ForeignKey(Offer, on_delete=models.CASCADE, related_name="offer_skills")
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name="offer_skills")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["offer", "skill"], name="offerskill_offer_skill_unique"),
+        ]
+        indexes = [
+            # index inversé : compétence -> offres
+            models.Index(fields=["skill", "offer"], name="offerskill_skill_offer_idx"),
+        ]
+
+
+class OfferCard(models.Model):
+    """
+    Projection d'une offre prête à afficher (liste et pages détail) :
+    champs de l'offre + organisation, lue en une seule requête.
+    Maintenue par offers.signals, voir offers.cards.
+    """
+
+    offer = models.OneToOneField(Offer, on_delete=models.CASCADE, primary_key=True, related_name="card")
+    title = models.CharField(max_length=255)
+    contract_type = models.CharField(max_length=20, choices=Offer.ContractType.choices)
+    location = models.CharField(max_length=255)
+    duration = models.CharField(max_length=50, blank=True)
+    remote = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    organisation_name = models.CharField(max_length=255, blank=True)
+    organisation_description = models.TextField(blank=True)
+    logo_url = models.CharField(max_length=500, blank=True)
+    country_code = models.CharField(max_length=10, blank=True)
+    organisation_updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["organisation_name"], name="offercard_org_name_trgm_idx", opclasses=["gin_trgm_ops"]),
+        ]
+
+    def __str__(self) -> str:
+        return self.title
+
+
+class OfferDeletion(models.Model):
+    """Trace d'une offre supprimée, pour la synchronisation par différence de l'API (offers.api)."""
+
+    offer_id = models.UUIDField(primary_key=True)
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self) -> str:
+        return str(self.offer_id)
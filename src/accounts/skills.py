@@ -0,0 +1,21 @@
+import re
+
+from .countries import normalize_search_text
+
+MAX_SKILL_LENGTH = 100
+
+
+def skill_key(label):
+    """Clé de comparaison d'une compétence : "Développement  Web" -> "developpement web"."""
+    return re.sub(r"\s+", " ", normalize_search_text(label)).strip()[:MAX_SKILL_LENGTH]
+
+
+def parse_skills(text):
+    """{clé: libellé} des compétences d'un champ `Offer.skills` séparées par des virgules."""
+    skills = {}
+    for label in (text or "").split(","):
+        label = re.sub(r"\s+", " ", label).strip()[:MAX_SKILL_LENGTH]
+        key = skill_key(label)
+        if key:
+            skills.setdefault(key, label)
+    return skills
@@ -0,0 +1,134 @@
+"""File d'envoi des emails (accounts.OutboundEmail).
+
+SpoolBackend enregistre les messages et rend la main sans réseau ; le
+dispatcher `manage.py run_mail_dispatcher` réserve des lots avec
+SELECT ... FOR UPDATE SKIP LOCKED, les envoie sur une seule connexion de
+EMAIL_SPOOL_BACKEND et replanifie les échecs avec une attente exponentielle.
+Un lot réservé n'est repris par un autre dispatcher qu'après lease() : le
+temps d'envoyer tout le lot, chaque opération SMTP étant bornée par
+EMAIL_TIMEOUT, pour qu'un serveur lent ne fasse pas envoyer deux fois.
+Après EMAIL_SPOOL_MAX_ATTEMPTS essais, l'email est abandonné (DEAD).
+
+Les invitations restent PENDING tant que leur email est en file, puis
+passent à SENT ou FAILED selon l'envoi réel.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.mail import send_mass_messages
+from accounts.models import OutboundEmail, StudentInvitation
+
+
+def spool_messages(messages):
+    """Met les EmailMessage en file, en une requête."""
+    rows = []
+    for message in messages:
+        if message.attachments:
+            raise ValueError("SpoolBackend ne gère pas les pièces jointes.")
+        rows.append(
+            OutboundEmail(
+                subject=message.subject,
+                body=message.body,
+                from_email=message.from_email,
+                to=list(message.to),
+                cc=list(message.cc),
+                bcc=list(message.bcc),
+                reply_to=list(message.reply_to),
+                headers=dict(message.extra_headers),
+                alternatives=[list(alternative) for alternative in getattr(message, "alternatives", [])],
+                # posé par invitations.imports sur les emails d'invitation
+                invitation_id=getattr(message, "invitation_id", None),
+            )
+        )
+    return OutboundEmail.objects.bulk_create(rows)
+
+
+def _to_message(email):
+    return EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        cc=email.cc,
+        bcc=email.bcc,
+        reply_to=email.reply_to,
+        headers=email.headers,
+        alternatives=[tuple(alternative) for alternative in email.alternatives],
+    )
+
+
+def backoff(attempts):
+    """Attente avant le nouvel essai qui suit le `attempts`-ième échec."""
+    return timedelta(seconds=min(settings.EMAIL_SPOOL_BACKOFF * 2 ** (attempts - 1), settings.EMAIL_SPOOL_MAX_BACKOFF))
+
+
+def lease(size):
+    """Durée de réservation d'un lot de `size` emails : un envoi par email et les reconnexions, plus une marge."""
+    operations = size + settings.EMAIL_BATCH_MAX_RECONNECTS
+    return timedelta(seconds=operations * settings.EMAIL_TIMEOUT + settings.EMAIL_SPOOL_LEASE)
+
+
+def claim_batch(size):
+    """Réserve jusqu'à `size` emails à envoyer ; ceux verrouillés par un autre dispatcher sont sautés."""
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.Status.QUEUED, next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:size]
+        )
+        leased_until = now + lease(size)
+        for email in batch:
+            email.attempts += 1
+            email.next_attempt_at = leased_until
+        OutboundEmail.objects.bulk_update(batch, ["attempts", "next_attempt_at"])
+    return batch
+
+
+def dispatch_batch(batch):
+    """Envoie un lot réservé ; retourne le nombre d'emails (envoyés, replanifiés, abandonnés)."""
+    outbox = {email.pk: _to_message(email) for email in batch}
+    connection = get_connection(settings.EMAIL_SPOOL_BACKEND)
+    errors = {id(message): error for message, error in send_mass_messages(list(outbox.values()), connection)}
+    now = timezone.now()
+    sent, retried, dead = [], [], []
+    for email in batch:
+        error = errors.get(id(outbox[email.pk]))
+        if error is None:
+            email.status = OutboundEmail.Status.SENT
+            email.sent_at = now
+            email.last_error = ""
+            sent.append(email)
+            continue
+        email.last_error = error[:255]
+        if email.attempts >= settings.EMAIL_SPOOL_MAX_ATTEMPTS:
+            email.status = OutboundEmail.Status.DEAD
+            dead.append(email)
+        else:
+            email.next_attempt_at = now + backoff(email.attempts)
+            retried.append(email)
+    with transaction.atomic():
+        OutboundEmail.objects.bulk_update(batch, ["status", "sent_at", "next_attempt_at", "last_error"])
+        # une invitation déjà utilisée ou expirée garde son statut
+        StudentInvitation.objects.filter(
+            pk__in=[email.invitation_id for email in sent if email.invitation_id],
+            status__in=[StudentInvitation.Status.PENDING, StudentInvitation.Status.FAILED],
+        ).update(status=StudentInvitation.Status.SENT, sent_at=now, error_message="")
+        StudentInvitation.objects.filter(
+            pk__in=[email.invitation_id for email in dead if email.invitation_id],
+            status=StudentInvitation.Status.PENDING,
+        ).update(status=StudentInvitation.Status.FAILED, error_message="Erreur d'envoi")
+    return len(sent), len(retried), len(dead)
+
+
+def dispatch_pending():
+    """Envoie les emails dus jusqu'à ce que la file soit vide ; retourne les totaux (envoyés, replanifiés, abandonnés)."""
+    totals = [0, 0, 0]
+    while batch := claim_batch(settings.EMAIL_SPOOL_BATCH_SIZE):
+        for index, count in enumerate(dispatch_batch(batch)):
+            totals[index] += count
+    return tuple(totals)
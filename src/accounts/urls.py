@@ -10,6 +10,7 @@ from .views import (
     RegisterView,
     SimpleLoginView,
     TwoFactorView,
+    two_factor_status,
 )
 
 app_name = "accounts"
@@ -21,6 +22,7 @@ urlpatterns = [
     path("register/student-info/", RegisterStudentInfoView.as_view(), name="register_student_info"),
     path("register/", RegisterView.as_view(), name="register"),
     path("two-factor/", TwoFactorView.as_view(), name="two_factor"),
+    path("two-factor/status/", two_factor_status, name="two_factor_status"),
     path("password-reset/", PasswordResetRequestView.as_view(), name="password_reset_request"),
     path("password-reset/confirm/", PasswordResetConfirmView.as_view(), name="password_reset_confirm"),
     path("invitation/<str:token>/", InvitationAcceptView.as_view(), name="invitation_accept"),
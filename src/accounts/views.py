@@ -10,8 +10,8 @@ from django.contrib.auth.hashers import make_password
 from django.contrib.auth.views import LoginView
 from django.core.files.base import File
 from django.core.files.storage import default_storage
-from django.core.mail import send_mail
-from django.shortcuts import get_object_or_404, redirect
+from django.core.mail import EmailMessage
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.views.generic import FormView, TemplateView
@@ -24,6 +24,7 @@ from .forms import (
     RegistrationForm,
     TwoFactorForm,
 )
+from .mail import delivery_status, send_in_background
 from .models import CompanyProfile, InstitutionProfile, StudentInvitation, StudentProfile, User
 
 SESSION_USER_KEY = "two_factor_user_id"
@@ -36,6 +37,7 @@ SESSION_EMAIL_KEY = "two_factor_email"
 SESSION_SUBJECT_KEY = "two_factor_subject"
 SESSION_TEMPLATE_KEY = "two_factor_template"
 SESSION_RESET_EMAIL = "password_reset_email"
+SESSION_DELIVERY_KEY = "two_factor_delivery"
 
 
 def _send_two_factor_code(session, email, subject, message_template):
@@ -46,7 +48,9 @@ def _send_two_factor_code(session, email, subject, message_template):
     session[SESSION_SUBJECT_KEY] = subject
     session[SESSION_TEMPLATE_KEY] = message_template
     from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None)
-    send_mail(subject, message_template.format(code=code), from_email, [email], fail_silently=True)
+    # la réponse part sans attendre le serveur SMTP ; l'état de l'envoi est affiché sur la page two_factor
+    message = EmailMessage(subject, message_template.format(code=code), from_email, [email])
+    session[SESSION_DELIVERY_KEY] = send_in_background(message)
 
 
 def _create_student_profile(user, invitation=None):
@@ -297,6 +301,7 @@ class TwoFactorView(FormView):
         if not email and getattr(self.request.user, "is_authenticated", False):
             email = self.request.user.email
         context["target_email"] = email
+        context["delivery_status"] = delivery_status(self.request.session.get(SESSION_DELIVERY_KEY))
         return context
 
     def form_valid(self, form):
@@ -392,6 +397,7 @@ class TwoFactorView(FormView):
             SESSION_EMAIL_KEY,
             SESSION_SUBJECT_KEY,
             SESSION_TEMPLATE_KEY,
+            SESSION_DELIVERY_KEY,
         ):
             session.pop(key, None)
 
@@ -404,7 +410,7 @@ class TwoFactorView(FormView):
         subject = session.get(SESSION_SUBJECT_KEY) or "Code de vérification"
         template = session.get(SESSION_TEMPLATE_KEY) or "Ton code de connexion est : {code}"
         _send_two_factor_code(session, email, subject, template)
-        messages.success(self.request, "Un nouveau code vient de t'être envoyé.")
+        messages.success(self.request, "Un nouveau code est en cours d'envoi.")
 
     def _get_target_email(self):
         session = self.request.session
@@ -421,6 +427,15 @@ class TwoFactorView(FormView):
         return None
 
 
+def two_factor_status(request):
+    """État de l'envoi du dernier code, relu par htmx tant qu'il est en cours."""
+    return render(
+        request,
+        "accounts/partials/two_factor_status.html",
+        {"delivery_status": delivery_status(request.session.get(SESSION_DELIVERY_KEY))},
+    )
+
+
 class PasswordResetRequestView(FormView):
     template_name = "accounts/password_reset_request.html"
     form_class = PasswordResetRequestForm
@@ -486,5 +501,5 @@ class PasswordResetConfirmView(FormView):
         return super().form_valid(form)
 
     def _clear_session(self):
-        for key in (SESSION_RESET_EMAIL, SESSION_CODE_KEY, SESSION_EXPIRY_KEY, SESSION_EMAIL_KEY):
+        for key in (SESSION_RESET_EMAIL, SESSION_CODE_KEY, SESSION_EXPIRY_KEY, SESSION_EMAIL_KEY, SESSION_DELIVERY_KEY):
             self.request.session.pop(key, None)
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""Lectures des vues publiques sur les réplicas PostgreSQL.
+
+Les vues marquées `replica_reads` (décorateur, ou attribut de classe sur
+une vue générique) lisent sur un des alias `replica_*` de DATABASES ;
+toutes les écritures, et les lectures des autres vues, restent sur
+`default`.
+
+Après une requête qui écrit (POST, PUT, PATCH, DELETE), un cookie épingle
+le navigateur sur `default` pendant DATABASE_REPLICA_PIN_SECONDS : il relit
+ce qu'il vient d'écrire même si le réplica a du retard.
+
+Ce cookie ne protège que ce navigateur : tout ce qui remplit un cache
+partagé (page détail, pages de recherche, facettes, index d'autocomplétion)
+est calculé dans un bloc `primary_reads`, sinon une lecture en retard juste
+après une écriture remettrait en cache des données périmées pour tous.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PIN_COOKIE = "mosifra_db_pin"
+
+# apps toujours lues sur default : la session doit refléter la connexion qui vient d'avoir lieu
+PRIMARY_APPS = {"sessions"}
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica_")]
+
+
+def replica_reads(view):
+    """Autorise la vue à lire sur un réplica."""
+    view.replica_reads = True
+    return view
+
+
+@contextmanager
+def primary_reads():
+    """Lectures sur default dans le bloc, même dans une vue `replica_reads`."""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def _allows_replica(view_func):
+    view_class = getattr(view_func, "view_class", None)
+    return getattr(view_func, "replica_reads", False) or getattr(view_class, "replica_reads", False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or model._meta.app_label in PRIMARY_APPS:
+            return None
+        aliases = replica_aliases()
+        return random.choice(aliases) if aliases else None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # les réplicas sont des copies de default
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # un réplica reçoit le schéma par la réplication
+        return db == "default"
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            # le rendu des templates (querysets paresseux) a eu lieu : on peut revenir à default
+            token = getattr(request, "_replica_reads_token", None)
+            if token is not None:
+                _replica_reads.reset(token)
+        if request.method not in ("GET", "HEAD", "OPTIONS", "TRACE") and response.status_code < 400:
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=settings.DATABASE_REPLICA_PIN_SECONDS, httponly=True, samesite="Lax"
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in ("GET", "HEAD") and PIN_COOKIE not in request.COOKIES and _allows_replica(view_func):
+            request._replica_reads_token = _replica_reads.set(True)
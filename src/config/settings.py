@@ -26,6 +26,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "accounts",
     "profiles",
     "offers",
@@ -42,6 +43,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "config.replicas.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -80,6 +82,35 @@ DATABASES = {
     }
 }
 
+# réplicas en lecture des vues publiques (config.replicas), ex. DJANGO_DB_REPLICA_HOSTS=localhost:5433
+# nom, utilisateur et mot de passe repris de default sauf DJANGO_DB_REPLICA_NAME / _USER / _PASSWORD
+for index, replica_host in enumerate(filter(None, os.environ.get("DJANGO_DB_REPLICA_HOSTS", "").split(","))):
+    host, _, port = replica_host.strip().partition(":")
+    DATABASES[f"replica_{index + 1}"] = {
+        **DATABASES["default"],
+        "NAME": os.environ.get("DJANGO_DB_REPLICA_NAME", DATABASES["default"]["NAME"]),
+        "USER": os.environ.get("DJANGO_DB_REPLICA_USER", DATABASES["default"]["USER"]),
+        "PASSWORD": os.environ.get("DJANGO_DB_REPLICA_PASSWORD", DATABASES["default"]["PASSWORD"]),
+        "HOST": host,
+        "PORT": port or "5432",
+        # les tests lisent les réplicas sur la base de test de default
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["config.replicas.ReplicaRouter"]
+# durée pendant laquelle un navigateur qui vient d'écrire lit sur default
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get("DJANGO_DB_REPLICA_PIN_SECONDS", "15"))
+
+# locmem par défaut, ex. DJANGO_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# et DJANGO_CACHE_LOCATION=/var/tmp/mosifra_cache pour partager le cache entre workers.
+# Obligatoire dès qu'il y a plusieurs processus : avec locmem, chaque worker a sa propre
+# génération de recherche (offers.search_cache) et ne voit pas les modifications faites ailleurs.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION", ""),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS: list[dict[str, str]] = []
 
 LANGUAGE_CODE = "fr"
@@ -95,6 +126,20 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# liste publique des offres : taille de page et comptage estimé (EXPLAIN) au lieu de COUNT(*)
+OFFERS_PAGE_SIZE = int(os.environ.get("DJANGO_OFFERS_PAGE_SIZE", "20"))
+OFFERS_APPROXIMATE_COUNT = os.environ.get("DJANGO_OFFERS_APPROXIMATE_COUNT", "False").lower() == "true"
+OFFERS_FACETS_CACHE_TIMEOUT = int(os.environ.get("DJANGO_OFFERS_FACETS_CACHE_TIMEOUT", "300"))
+OFFERS_SEARCH_CACHE_TIMEOUT = int(os.environ.get("DJANGO_OFFERS_SEARCH_CACHE_TIMEOUT", "300"))
+OFFERS_CARD_CACHE_TIMEOUT = int(os.environ.get("DJANGO_OFFERS_CARD_CACHE_TIMEOUT", "86400"))
+OFFERS_DETAIL_CACHE_TIMEOUT = int(os.environ.get("DJANGO_OFFERS_DETAIL_CACHE_TIMEOUT", "86400"))
+OFFERS_DEFAULT_RADIUS_KM = int(os.environ.get("DJANGO_OFFERS_DEFAULT_RADIUS_KM", "30"))
+OFFERS_AUTOCOMPLETE_MAX_AGE = int(os.environ.get("DJANGO_OFFERS_AUTOCOMPLETE_MAX_AGE", "300"))
+OFFERS_AUTOCOMPLETE_REBUILD_INTERVAL = int(os.environ.get("DJANGO_OFFERS_AUTOCOMPLETE_REBUILD_INTERVAL", "60"))
+OFFERS_API_PAGE_SIZE = int(os.environ.get("DJANGO_OFFERS_API_PAGE_SIZE", "100"))
+# recul du watermark de l'API sur l'heure du serveur : transactions encore ouvertes et horloges décalées
+OFFERS_API_SYNC_MARGIN = int(os.environ.get("DJANGO_OFFERS_API_SYNC_MARGIN", "60"))
+
 LOGIN_URL = "accounts:login"
 LOGIN_REDIRECT_URL = "home"
 
@@ -107,12 +152,28 @@ if EMAIL_BACKEND == "gmail_oauth":
     GMAIL_CLIENT_ID = os.environ.get("DJANGO_GMAIL_CLIENT_ID", "")
     GMAIL_CLIENT_SECRET = os.environ.get("DJANGO_GMAIL_CLIENT_SECRET", "")
     GMAIL_REFRESH_TOKEN = os.environ.get("DJANGO_GMAIL_REFRESH_TOKEN", "")
+    GMAIL_TOKEN_URL = os.environ.get("DJANGO_GMAIL_TOKEN_URL", "https://oauth2.googleapis.com/token")
+    # access token renouvelé GMAIL_TOKEN_MARGIN secondes avant son expiration ;
+    # avec GMAIL_TOKEN_SHARED_CACHE, un seul token pour tous les workers (cache default partagé)
+    GMAIL_TOKEN_MARGIN = int(os.environ.get("DJANGO_GMAIL_TOKEN_MARGIN", "300"))
+    GMAIL_TOKEN_SHARED_CACHE = os.environ.get("DJANGO_GMAIL_TOKEN_SHARED_CACHE", "False").lower() == "true"
     EMAIL_HOST = "smtp.gmail.com"
     EMAIL_PORT = 587
     EMAIL_USE_TLS = True
     EMAIL_USE_SSL = False
     EMAIL_HOST_USER = os.environ.get("DJANGO_EMAIL_HOST_USER", "")
 DEFAULT_FROM_EMAIL = os.environ.get("DJANGO_DEFAULT_FROM_EMAIL", "no-reply@mosifra.local")
+# envois groupés sur une seule connexion (accounts.mail) : reconnexions autorisées par paquet
+EMAIL_BATCH_SIZE = int(os.environ.get("DJANGO_EMAIL_BATCH_SIZE", "100"))
+EMAIL_BATCH_MAX_RECONNECTS = int(os.environ.get("DJANGO_EMAIL_BATCH_MAX_RECONNECTS", "3"))
+# délai maximal d'une opération SMTP : un serveur bloqué ne retient pas un worker au-delà de son bail
+EMAIL_TIMEOUT = int(os.environ.get("DJANGO_EMAIL_TIMEOUT", "30"))
+# envois hors requête (codes 2FA) : threads d'envoi et messages en attente au plus.
+# L'état d'un envoi est lu dans le cache default, partagé entre les workers (voir CACHES) ;
+# un envoi encore "en cours" après EMAIL_BACKGROUND_PENDING_TIMEOUT secondes (processus tué) devient inconnu
+EMAIL_BACKGROUND_WORKERS = int(os.environ.get("DJANGO_EMAIL_BACKGROUND_WORKERS", "4"))
+EMAIL_BACKGROUND_QUEUE = int(os.environ.get("DJANGO_EMAIL_BACKGROUND_QUEUE", "100"))
+EMAIL_BACKGROUND_PENDING_TIMEOUT = int(os.environ.get("DJANGO_EMAIL_BACKGROUND_PENDING_TIMEOUT", "120"))
 
 if EMAIL_BACKEND == "django.core.mail.backends.smtp.EmailBackend":
     EMAIL_HOST = os.environ.get("DJANGO_EMAIL_HOST", "")
@@ -121,3 +182,20 @@ if EMAIL_BACKEND == "django.core.mail.backends.smtp.EmailBackend":
     EMAIL_HOST_PASSWORD = os.environ.get("DJANGO_EMAIL_HOST_PASSWORD", "")
     EMAIL_USE_TLS = os.environ.get("DJANGO_EMAIL_USE_TLS", "True").lower() == "true"
     EMAIL_USE_SSL = os.environ.get("DJANGO_EMAIL_USE_SSL", "False").lower() == "true"
+
+# DJANGO_EMAIL_SPOOL=True : les emails sont mis en file (accounts.OutboundEmail) et envoyés
+# par `manage.py run_mail_dispatcher` avec le backend configuré ci-dessus
+EMAIL_SPOOL_BACKEND = EMAIL_BACKEND
+if os.environ.get("DJANGO_EMAIL_SPOOL", "False").lower() == "true":
+    EMAIL_BACKEND = "accounts.email_backends.SpoolBackend"
+EMAIL_SPOOL_MAX_ATTEMPTS = int(os.environ.get("DJANGO_EMAIL_SPOOL_MAX_ATTEMPTS", "8"))
+# attente avant le n-ième nouvel essai : EMAIL_SPOOL_BACKOFF * 2**(n-1) secondes, plafonnée
+EMAIL_SPOOL_BACKOFF = int(os.environ.get("DJANGO_EMAIL_SPOOL_BACKOFF", "30"))
+EMAIL_SPOOL_MAX_BACKOFF = int(os.environ.get("DJANGO_EMAIL_SPOOL_MAX_BACKOFF", "3600"))
+# emails réservés à la fois par le dispatcher ; un lot jamais terminé (dispatcher arrêté)
+# repart après (taille du lot + EMAIL_BATCH_MAX_RECONNECTS) * EMAIL_TIMEOUT + EMAIL_SPOOL_LEASE secondes
+EMAIL_SPOOL_BATCH_SIZE = int(os.environ.get("DJANGO_EMAIL_SPOOL_BATCH_SIZE", "20"))
+EMAIL_SPOOL_LEASE = int(os.environ.get("DJANGO_EMAIL_SPOOL_LEASE", "60"))
+# un import d'invitations RUNNING sans nouvelles depuis plus longtemps (worker arrêté) est repris
+# par un autre worker ; le worker actif repousse ce délai après chaque paquet de EMAIL_BATCH_SIZE emails
+INVITATION_IMPORT_LEASE = int(os.environ.get("DJANGO_INVITATION_IMPORT_LEASE", "900"))
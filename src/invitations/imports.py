@@ -0,0 +1,232 @@
+"""Traitement des imports CSV d'invitations (accounts.InvitationImport).
+
+La vue d'upload ne fait qu'enregistrer les lignes du CSV ; le worker
+`manage.py run_invitation_worker` réserve les imports en attente avec
+SELECT ... FOR UPDATE SKIP LOCKED (plusieurs workers ne prennent jamais le
+même import), crée les invitations, envoie les emails et enregistre le
+rapport affiché ensuite sur la page d'upload.
+"""
+import logging
+import uuid
+from datetime import timedelta
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import Lower
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.mail import send_mass_messages
+from accounts.models import InvitationImport, OutboundEmail, StudentInvitation, User
+
+logger = logging.getLogger(__name__)
+
+IMPORT_COLUMNS = ("email", "prenom", "nom", "filiere_ou_parcours", "niveau", "annee_academique")
+
+
+def _invitation_email(base_url, invitation):
+    link = urljoin(base_url, reverse("accounts:invitation_accept", args=[invitation.token]))
+    subject = "Invitation Mosifra"
+    message = (
+        f"Bonjour {invitation.first_name},\n\n"
+        f"Ton établissement t'invite à rejoindre Mosifra.\n"
+        f"Profil : {invitation.filiere} / {invitation.level} / {invitation.academic_year}\n\n"
+        f"Clique sur ce lien pour créer ton compte (valide jusqu'au {invitation.expires_at:%d/%m/%Y}) :\n{link}\n"
+    )
+    email = EmailMessage(subject, message, getattr(settings, "DEFAULT_FROM_EMAIL", None), [invitation.email])
+    # lu par SpoolBackend : le dispatcher met à jour le statut de l'invitation selon l'envoi réel
+    email.invitation_id = invitation.pk
+    return email
+
+
+def enqueue_import(institution, rows, base_url):
+    """Enregistre un import à traiter par le worker."""
+    return InvitationImport.objects.create(
+        institution=institution,
+        rows=[{name: (row.get(name) or "") for name in IMPORT_COLUMNS} for row in rows],
+        base_url=base_url,
+    )
+
+
+def _clean_row(row):
+    first_name = (row.get("prenom") or "").strip().title()
+    last_name = (row.get("nom") or "").strip().upper()
+    return {
+        "first_name": first_name or "Étudiant",
+        "last_name": last_name or "",
+        "filiere": (row.get("filiere_ou_parcours") or "").strip() or "N/A",
+        "level": (row.get("niveau") or "").strip() or "N/A",
+        "academic_year": (row.get("annee_academique") or "").strip() or "N/A",
+    }
+
+
+def process_rows(institution, rows, base_url, job=None):
+    """
+    Crée et envoie les invitations des lignes valides, en un nombre constant
+    de requêtes par paquet de EMAIL_BATCH_SIZE emails : lignes validées en
+    mémoire, comptes existants et invitations en cours résolus pour tout le
+    lot, bulk_create, puis un bulk_update des statuts par paquet envoyé.
+
+    Les invitations créées sont rattachées à `job` : si l'import est repris
+    après l'arrêt d'un worker, celles qui n'étaient pas encore parties sont
+    renvoyées au lieu d'être signalées "déjà en cours". Le paquet en cours
+    d'envoi au moment de l'arrêt peut être envoyé deux fois.
+    """
+    sent = 0
+    # (ligne, message), triées à la fin dans l'ordre du fichier
+    errors = []
+    valid = []
+    seen = set()
+    for idx, row in enumerate(rows, start=2):
+        email = (row.get("email") or "").strip().lower()
+        try:
+            validate_email(email)
+        except Exception:
+            errors.append((idx, f"email invalide ({email})."))
+            continue
+        if email in seen:
+            errors.append((idx, f"email en double dans le fichier ({email})."))
+            continue
+        seen.add(email)
+        valid.append((idx, email, row))
+
+    now = timezone.now()
+    emails = [email for _, email, _ in valid]
+    # User.email garde la casse saisie : comparé en minuscules (index user_email_lower_idx)
+    used = set(
+        User.objects.annotate(email_lower=Lower("email")).filter(email_lower__in=emails).values_list("email_lower", flat=True)
+    )
+    # les emails des invitations sont déjà en minuscules (index (email, institution)) ;
+    # celles de ce même import (reprise) sont relues quel que soit leur statut
+    current = Q(status__in=[StudentInvitation.Status.PENDING, StudentInvitation.Status.SENT], expires_at__gt=now)
+    if job is not None:
+        current |= Q(import_job=job)
+    existing = {
+        invitation.email: invitation
+        for invitation in StudentInvitation.objects.filter(current, institution=institution, email__in=emails).annotate(
+            # déjà confiée à SpoolBackend : le dispatcher s'en charge
+            spooled=Exists(OutboundEmail.objects.filter(invitation=OuterRef("pk")))
+        )
+    }
+
+    invitations = []
+    outgoing = []
+    lines = {}
+    for idx, email, row in valid:
+        if email in used:
+            errors.append((idx, f"email déjà utilisé ({email})."))
+            continue
+        invitation = existing.get(email)
+        if invitation is not None and (job is None or invitation.import_job_id != job.pk):
+            errors.append((idx, f"invitation déjà en cours pour {email}."))
+            continue
+        if invitation is None:
+            invitation = StudentInvitation(
+                institution=institution,
+                email=email,
+                token=uuid.uuid4().hex,
+                expires_at=now + timedelta(days=7),
+                import_job=job,
+                **_clean_row(row),
+            )
+            invitations.append(invitation)
+        elif invitation.status == StudentInvitation.Status.SENT or invitation.spooled:
+            # traitée avant l'arrêt du worker précédent
+            if invitation.status == StudentInvitation.Status.FAILED:
+                errors.append((idx, f"envoi impossible pour {invitation.email}."))
+            else:
+                sent += 1
+            continue
+        outgoing.append(invitation)
+        lines[invitation.pk] = idx
+    StudentInvitation.objects.bulk_create(invitations)
+
+    # chaque paquet sur une seule connexion SMTP (accounts.mail) ; ses statuts sont
+    # enregistrés avant le paquet suivant, pour qu'une reprise ne le renvoie pas
+    connection = get_connection()
+    # mis en file (SpoolBackend) : l'invitation reste PENDING jusqu'à l'envoi par le dispatcher
+    spooled = getattr(connection, "spools", False)
+    batch_size = settings.EMAIL_BATCH_SIZE
+    for start in range(0, len(outgoing), batch_size):
+        batch = outgoing[start : start + batch_size]
+        outbox = {invitation.pk: _invitation_email(base_url, invitation) for invitation in batch}
+        undelivered = {id(message) for message, _ in send_mass_messages(list(outbox.values()), connection)}
+        sent_at = timezone.now()
+        updated = []
+        for invitation in batch:
+            if id(outbox[invitation.pk]) in undelivered:
+                invitation.status = StudentInvitation.Status.FAILED
+                invitation.error_message = "Erreur d'envoi"
+                errors.append((lines[invitation.pk], f"envoi impossible pour {invitation.email}."))
+                updated.append(invitation)
+                continue
+            sent += 1
+            if not spooled:
+                invitation.status = StudentInvitation.Status.SENT
+                invitation.sent_at = sent_at
+                invitation.error_message = ""
+                updated.append(invitation)
+        # seules les lignes modifiées : le dispatcher a pu déjà passer une invitation en file à SENT
+        StudentInvitation.objects.bulk_update(updated, ["status", "sent_at", "error_message"])
+        if job is not None:
+            # le worker est vivant : le bail INVITATION_IMPORT_LEASE repart
+            InvitationImport.objects.filter(pk=job.pk).update(started_at=timezone.now())
+    return {
+        "sent": sent,
+        "failed": len(errors),
+        "errors": [f"Ligne {idx}: {message}" for idx, message in sorted(errors)],
+    }
+
+
+def claim_next_import():
+    """
+    Réserve le plus ancien import en attente, ou None ; les imports verrouillés
+    par un autre worker sont sautés. Un import RUNNING sans nouvelles depuis
+    plus de INVITATION_IMPORT_LEASE secondes (worker arrêté en cours de route)
+    est repris : process_rows renvoie ses invitations qui ne sont pas parties.
+    """
+    stale = timezone.now() - timedelta(seconds=settings.INVITATION_IMPORT_LEASE)
+    with transaction.atomic():
+        job = (
+            InvitationImport.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=InvitationImport.Status.PENDING)
+                | Q(status=InvitationImport.Status.RUNNING, started_at__lt=stale)
+            )
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = InvitationImport.Status.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at"])
+    return job
+
+
+def run_import(job):
+    try:
+        report = process_rows(job.institution, job.rows, job.base_url, job)
+    except Exception:
+        logger.exception("Import d'invitations %s interrompu", job.pk)
+        job.status = InvitationImport.Status.FAILED
+        job.errors = job.errors + ["Erreur inattendue pendant l'import, contactez le support."]
+    else:
+        job.status = InvitationImport.Status.DONE
+        job.sent, job.failed, job.errors = report["sent"], report["failed"], report["errors"]
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "sent", "failed", "errors", "finished_at"])
+    return job
+
+
+def run_pending_imports():
+    """Traite les imports en attente jusqu'à ce que la file soit vide ; retourne leur nombre."""
+    count = 0
+    while (job := claim_next_import()) is not None:
+        run_import(job)
+        count += 1
+    return count
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from invitations.imports import run_pending_imports
+
+
+class Command(BaseCommand):
+    help = "Traite les imports CSV d'invitations en attente (plusieurs workers peuvent tourner en parallèle)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=2.0, help="Secondes entre deux relevés de la file.")
+        parser.add_argument("--once", action="store_true", help="Vider la file puis s'arrêter.")
+
+    def handle(self, *args, interval, once, **options):
+        while True:
+            count = run_pending_imports()
+            if count:
+                self.stdout.write(f"{count} import(s) traité(s).")
+            if once:
+                return
+            time.sleep(interval)
+            # connexion fermée ou trop ancienne entre deux relevés : Django en rouvre une
+            close_old_connections()
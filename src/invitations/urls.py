@@ -1,11 +1,12 @@
 from django.urls import path
 
-from .views import InvitationUploadView, download_csv_model, preview_csv
+from .views import InvitationUploadView, download_csv_model, import_status, preview_csv
 
 app_name = "invitations"
 
 urlpatterns = [
     path("upload/", InvitationUploadView.as_view(), name="upload"),
+    path("imports/<uuid:import_id>/", import_status, name="import_status"),
     path("preview/", preview_csv, name="preview"),
     path("model/", download_csv_model, name="model"),
 ]
@@ -1,46 +1,23 @@
 import csv
 import uuid
-from datetime import timedelta
 
-from django.conf import settings
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.mail import send_mail
-from django.core.validators import validate_email
 from django.http import Http404, HttpResponse
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
-from django.utils import timezone
 from django.views.generic import FormView
 
 from accounts.forms import InvitationUploadForm
-from accounts.models import StudentInvitation, User
-
-
-def _send_invitation_email(request, invitation):
-    link = request.build_absolute_uri(
-        reverse("accounts:invitation_accept", args=[invitation.token])
-    )
-    subject = "Invitation Mosifra"
-    message = (
-        f"Bonjour {invitation.first_name},\n\n"
-        f"Ton établissement t'invite à rejoindre Mosifra.\n"
-        f"Profil : {invitation.filiere} / {invitation.level} / {invitation.academic_year}\n\n"
-        f"Clique sur ce lien pour créer ton compte (valide jusqu'au {invitation.expires_at:%d/%m/%Y}) :\n{link}\n"
-    )
-    send_mail(
-        subject,
-        message,
-        getattr(settings, "DEFAULT_FROM_EMAIL", None),
-        [invitation.email],
-        fail_silently=True,
-    )
+from accounts.models import InvitationImport, User
+
+from .imports import enqueue_import
 
 
 class InvitationUploadView(LoginRequiredMixin, FormView):
     template_name = "invitations/invitations_upload.html"
     form_class = InvitationUploadForm
     success_url = reverse_lazy("invitations:upload")
-    report = None
 
     def dispatch(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
@@ -51,12 +28,18 @@ class InvitationUploadView(LoginRequiredMixin, FormView):
 
     def form_valid(self, form):
         rows = form.read_rows()
-        self.report = self._process_rows(rows)
-        return self.render_to_response(self.get_context_data(form=self.form_class()))
+        # traité par manage.py run_invitation_worker, la page suit l'avancement
+        job = enqueue_import(self.request.user, rows, self.request.build_absolute_uri("/"))
+        return redirect(f"{reverse('invitations:upload')}?import={job.pk}")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["report"] = self.report
+        job = self._get_import()
+        if job is not None:
+            if job.is_finished:
+                context["report"] = job.report
+            else:
+                context["import_job"] = job
         user = self.request.user
         logo_url = None
         if hasattr(user, "institution_profile") and user.institution_profile.logo:
@@ -64,49 +47,24 @@ class InvitationUploadView(LoginRequiredMixin, FormView):
         context["logo_url"] = logo_url
         return context
 
-    def _process_rows(self, rows):
-        report = {"sent": 0, "failed": 0, "errors": []}
-        now = timezone.now()
-        for idx, row in enumerate(rows, start=2):
-            email = (row.get("email") or "").strip().lower()
-            try:
-                validate_email(email)
-            except Exception:
-                report["failed"] += 1
-                report["errors"].append(f"Ligne {idx}: email invalide ({email}).")
-                continue
-            if User.objects.filter(email__iexact=email).exists():
-                report["failed"] += 1
-                report["errors"].append(f"Ligne {idx}: email déjà utilisé ({email}).")
-                continue
-
-            first_name = (row.get("prenom") or "").strip().title()
-            last_name = (row.get("nom") or "").strip().upper()
-            filiere = (row.get("filiere_ou_parcours") or "").strip()
-            level = (row.get("niveau") or "").strip()
-            academic_year = (row.get("annee_academique") or "").strip()
-
-            token = uuid.uuid4().hex
-            invitation = StudentInvitation.objects.create(
-                institution=self.request.user,
-                email=email,
-                first_name=first_name or "Étudiant",
-                last_name=last_name or "",
-                filiere=filiere or "N/A",
-                level=level or "N/A",
-                academic_year=academic_year or "N/A",
-                token=token,
-                expires_at=now + timedelta(days=7),
-            )
-            try:
-                _send_invitation_email(self.request, invitation)
-                invitation.mark_sent()
-                report["sent"] += 1
-            except Exception:
-                invitation.mark_failed("Erreur d'envoi")
-                report["failed"] += 1
-                report["errors"].append(f"Ligne {idx}: envoi impossible pour {email}.")
-        return report
+    def _get_import(self):
+        import_id = self.request.GET.get("import", "")
+        try:
+            uuid.UUID(import_id)
+        except ValueError:
+            return None
+        return InvitationImport.objects.filter(pk=import_id, institution=self.request.user).first()
+
+
+@login_required
+def import_status(request, import_id):
+    job = get_object_or_404(InvitationImport, pk=import_id, institution=request.user)
+    if job.is_finished:
+        # la page se recharge et affiche le rapport
+        response = HttpResponse("")
+        response["HX-Refresh"] = "true"
+        return response
+    return render(request, "invitations/partials/import_status.html", {"import_job": job})
 
 
 def download_csv_model(request):
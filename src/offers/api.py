@@ -0,0 +1,214 @@
+"""API JSON en lecture seule du catalogue des offres (/offres/api/v1/).
+
+Pensée pour les écoles partenaires qui interrogent le catalogue toutes les
+quelques minutes : pas de template, pagination par curseur
+(offers.pagination), synchronisation par différence avec ?updated_since=
+et sélection des champs avec ?fields=id,title,location.
+
+Chaque liste renvoie un "watermark" : l'heure du serveur au début de la
+synchronisation, moins OFFERS_API_SYNC_MARGIN secondes pour les
+transactions pas encore validées. Le client le repasse tel quel en
+?updated_since= à la synchronisation suivante. Avec ?updated_since=, la
+première page liste aussi dans "deleted" les ids des offres supprimées
+depuis (accounts.OfferDeletion).
+
+Chaque réponse porte un ETag fort calculé à partir des dates de
+modification des offres de la page (et de leur organisation), des champs
+demandés et du curseur suivant : il est comparé à If-None-Match avant
+toute sérialisation et une page inchangée répond 304 sans corps.
+"""
+import hashlib
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+from accounts.models import Offer, OfferDeletion
+from config.replicas import replica_reads
+
+from .cards import offer_cards
+from .pagination import KeysetPaginator
+
+# champs exposés, lus sur l'offre ou sur sa carte (accounts.OfferCard)
+OFFER_FIELDS = (
+    "title",
+    "contract_type",
+    "location",
+    "skills",
+    "remote",
+    "salary",
+    "start_date",
+    "duration",
+    "description",
+    "created_at",
+    "updated_at",
+)
+CARD_FIELDS = ("organisation_name", "organisation_description", "logo_url", "country_code")
+API_FIELDS = ("id", *OFFER_FIELDS, *CARD_FIELDS, "url")
+
+# ordre du catalogue et ordre de la synchronisation par différence
+CATALOGUE_ORDERING = ["-created_at", "id"]
+DELTA_ORDERING = ["updated_at", "id"]
+
+
+class ApiError(Exception):
+    pass
+
+
+def _error(message, status=400):
+    return JsonResponse({"error": message}, status=status)
+
+
+def parse_fields(value):
+    """Champs demandés dans ?fields=, dans l'ordre de API_FIELDS ; l'id est toujours renvoyé."""
+    if not value:
+        return API_FIELDS
+    wanted = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = wanted.difference(API_FIELDS)
+    if unknown:
+        raise ApiError(f"Champs inconnus : {', '.join(sorted(unknown))}")
+    return tuple(name for name in API_FIELDS if name == "id" or name in wanted)
+
+
+def parse_updated_since(value, name="updated_since"):
+    if not value:
+        return None
+    since = parse_datetime(value)
+    if since is None:
+        raise ApiError(f"{name} doit être une date ISO 8601")
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def _queryset(fields):
+    # les dates servent à l'ETag même quand elles ne sont pas demandées
+    only = {"id", "created_at", "updated_at", "card__organisation_updated_at"}
+    only.update(name for name in fields if name in OFFER_FIELDS)
+    only.update(f"card__{name}" for name in fields if name in CARD_FIELDS)
+    return Offer.objects.select_related("card").only(*only)
+
+
+def _version(offer):
+    organisation_updated_at = offer.card.organisation_updated_at
+    organisation_version = organisation_updated_at.isoformat() if organisation_updated_at else ""
+    return f"{offer.pk}:{offer.updated_at.isoformat()}:{organisation_version}"
+
+
+def _etag(offers, fields, extra=""):
+    raw = "|".join([",".join(fields), extra, *(_version(offer) for offer in offers)])
+    return quote_etag(hashlib.md5(raw.encode("utf-8")).hexdigest())
+
+
+def _last_modified(offer):
+    return max(filter(None, [offer.updated_at, offer.card.organisation_updated_at]))
+
+
+def serialize_offer(request, offer, fields):
+    data = {}
+    for name in fields:
+        if name == "id":
+            data[name] = offer.pk
+        elif name == "url":
+            data[name] = request.build_absolute_uri(reverse("offers:detail_public", kwargs={"pk": offer.pk}))
+        elif name in CARD_FIELDS:
+            data[name] = getattr(offer.card, name)
+        else:
+            data[name] = getattr(offer, name)
+    return data
+
+
+def _conditional_json(request, data_func, etag, last_modified=None):
+    """304 si le client a déjà cette version, sinon la réponse JSON avec ses validateurs."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = JsonResponse(data_func())
+    response["ETag"] = etag
+    if timestamp is not None:
+        response["Last-Modified"] = http_date(timestamp)
+    # les clients doivent revalider à chaque fois, mais un 304 ne coûte presque rien
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+@replica_reads
+@require_safe
+def offer_list(request):
+    cursor = request.GET.get("cursor", "")
+    try:
+        fields = parse_fields(request.GET.get("fields", ""))
+        since = parse_updated_since(request.GET.get("updated_since", ""))
+        # pages suivantes : le watermark de la première page, repris dans le lien "next"
+        watermark = parse_updated_since(request.GET.get("watermark", ""), "watermark") if cursor else None
+    except ApiError as error:
+        return _error(str(error))
+    if watermark is None:
+        # pris avant la lecture : une offre enregistrée pendant la synchronisation reviendra la fois suivante
+        watermark = timezone.now() - timedelta(seconds=settings.OFFERS_API_SYNC_MARGIN)
+
+    offers = _queryset(fields)
+    ordering = CATALOGUE_ORDERING
+    deleted = None
+    if since is not None:
+        # une organisation modifiée change aussi ce que renvoient ses offres
+        offers = offers.filter(Q(updated_at__gt=since) | Q(card__organisation_updated_at__gt=since))
+        ordering = DELTA_ORDERING
+        deleted = []
+        if not cursor:
+            deleted = list(
+                OfferDeletion.objects.filter(deleted_at__gt=since).order_by("deleted_at").values_list("offer_id", flat=True)
+            )
+
+    paginator = KeysetPaginator(ordering, settings.OFFERS_API_PAGE_SIZE)
+    page, next_cursor = paginator.paginate(offers, cursor)
+    offer_cards(page)
+    page = [offer for offer in page if hasattr(offer, "card")]
+
+    next_url = None
+    if next_cursor:
+        params = {name: value for name, value in request.GET.items() if name not in ("cursor", "watermark")}
+        params.update(watermark=watermark.isoformat(), cursor=next_cursor)
+        next_url = request.build_absolute_uri(f"{request.path}?{urlencode(params)}")
+
+    def data():
+        body = {
+            "results": [serialize_offer(request, offer, fields) for offer in page],
+            "next": next_url,
+            "watermark": watermark.isoformat(),
+        }
+        if deleted is not None:
+            body["deleted"] = deleted
+        return body
+
+    # pas de Last-Modified sur une page : une offre supprimée ne la rendrait pas plus récente.
+    # Le watermark n'entre pas dans l'ETag : sur un 304, rien n'a changé et le client garde son updated_since.
+    extra = "|".join([next_cursor or "", *(str(offer_id) for offer_id in deleted or [])])
+    return _conditional_json(request, data, _etag(page, fields, extra))
+
+
+@replica_reads
+@require_safe
+def offer_detail(request, pk):
+    try:
+        fields = parse_fields(request.GET.get("fields", ""))
+    except ApiError as error:
+        return _error(str(error))
+    offer = get_object_or_404(_queryset(fields), pk=pk)
+    if not offer_cards([offer]):
+        raise Http404
+    return _conditional_json(
+        request,
+        lambda: serialize_offer(request, offer, fields),
+        _etag([offer], fields),
+        _last_modified(offer),
+    )
@@ -0,0 +1,168 @@
+"""Autocomplétion des compétences, villes et organisations.
+
+Chaque type de suggestion est un index de préfixes en mémoire : un tableau
+trié de clés normalisées interrogé avec bisect, donc une recherche en
+O(log n) sans requête SQL. Les index sont construits au premier appel puis
+reconstruits dans un thread quand la génération des offres
+(offers.search_cache) a changé, au plus une fois par
+OFFERS_AUTOCOMPLETE_REBUILD_INTERVAL secondes : les requêtes continuent
+d'être servies par les anciens index pendant la reconstruction. Entre deux
+reconstructions, les offres créées par ce processus y sont ajoutées au fil
+de l'eau (offers.signals) ; les modifications attendent la reconstruction.
+"""
+import bisect
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count
+
+from accounts.countries import normalize_search_text
+from accounts.models import OfferCard, Skill
+from accounts.skills import parse_skills
+from config.replicas import primary_reads
+
+from .search_cache import current_generation
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("skill", "city", "organisation", "search")
+
+# nombre maximum de clés parcourues après le préfixe avant de trier par poids
+SCAN_LIMIT = 200
+
+
+class PrefixIndex:
+    """
+    Clés, libellés et poids sont publiés ensemble dans un tuple remplacé d'un
+    bloc par `add` (copie sous verrou) : `suggest` lit un instantané cohérent
+    sans verrou, même pendant un ajout depuis un autre thread.
+    """
+
+    def __init__(self, weights=None):
+        # clé normalisée -> [libellé, poids]
+        entries = {}
+        for label, weight in (weights or {}).items():
+            self._merge(entries, label, weight)
+        keys = sorted(entries)
+        self._snapshot = (keys, [entries[key][0] for key in keys], [entries[key][1] for key in keys])
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _merge(entries, label, weight):
+        key = normalize_search_text(label.strip())
+        if not key:
+            return
+        entry = entries.setdefault(key, [label.strip(), 0])
+        entry[1] += weight
+
+    def add(self, label, weight=1):
+        key = normalize_search_text(label.strip())
+        if not key:
+            return
+        with self._lock:
+            keys, labels, weights = self._snapshot
+            index = bisect.bisect_left(keys, key)
+            if index < len(keys) and keys[index] == key:
+                weights = weights.copy()
+                weights[index] += weight
+                self._snapshot = (keys, labels, weights)
+                return
+            self._snapshot = (
+                [*keys[:index], key, *keys[index:]],
+                [*labels[:index], label.strip(), *labels[index:]],
+                [*weights[:index], weight, *weights[index:]],
+            )
+
+    def suggest(self, prefix, limit=8):
+        key = normalize_search_text(prefix.strip())
+        if not key:
+            return []
+        keys, labels, weights = self._snapshot
+        start = bisect.bisect_left(keys, key)
+        matches = []
+        for index in range(start, min(start + SCAN_LIMIT, len(keys))):
+            if not keys[index].startswith(key):
+                break
+            matches.append(index)
+        matches.sort(key=lambda index: -weights[index])
+        return [labels[index] for index in matches[:limit]]
+
+
+def _build_indexes():
+    # gardés jusqu'à la génération suivante : construits sur default, pas sur un réplica en retard
+    with primary_reads():
+        return _read_indexes()
+
+
+def _read_indexes():
+    skills = dict(Skill.objects.filter(offer_count__gt=0).values_list("label", "offer_count"))
+    cities = dict(OfferCard.objects.values_list("location").annotate(count=Count("offer")).order_by())
+    organisations = dict(OfferCard.objects.values_list("organisation_name").annotate(count=Count("offer")).order_by())
+    return {
+        "skill": PrefixIndex(skills),
+        "city": PrefixIndex(cities),
+        "organisation": PrefixIndex(organisations),
+    }
+
+
+_state = {"indexes": None, "generation": None, "built_at": 0.0, "rebuilding": False}
+_build_lock = threading.Lock()
+
+
+def get_indexes():
+    generation = current_generation()
+    if _state["indexes"] is None:
+        # premier appel du processus : rien à servir en attendant
+        with _build_lock:
+            if _state["indexes"] is None:
+                _state["indexes"] = _build_indexes()
+                _state["generation"] = generation
+                _state["built_at"] = time.monotonic()
+    elif (
+        _state["generation"] != generation
+        and not _state["rebuilding"]
+        and time.monotonic() - _state["built_at"] > settings.OFFERS_AUTOCOMPLETE_REBUILD_INTERVAL
+    ):
+        with _build_lock:
+            if not _state["rebuilding"]:
+                _state["rebuilding"] = True
+                threading.Thread(target=_rebuild, args=(generation,), name="autocomplete", daemon=True).start()
+    return _state["indexes"]
+
+
+def _rebuild(generation):
+    try:
+        indexes = _build_indexes()
+        _state.update(indexes=indexes, generation=generation)
+    except Exception:
+        logger.exception("Reconstruction des index d'autocomplétion impossible")
+    finally:
+        # même échouée, pas de nouvel essai avant OFFERS_AUTOCOMPLETE_REBUILD_INTERVAL
+        _state.update(built_at=time.monotonic(), rebuilding=False)
+        # connexion ouverte par ce thread : aucune requête ne la fermera
+        connections.close_all()
+
+
+def index_offer(offer):
+    """Ajout incrémental d'une offre créée, si les index sont déjà construits."""
+    indexes = _state["indexes"]
+    if indexes is None:
+        return
+    for skill in parse_skills(offer.skills).values():
+        indexes["skill"].add(skill)
+    indexes["city"].add(offer.location)
+    organisation_name = OfferCard.objects.filter(pk=offer.pk).values_list("organisation_name", flat=True).first()
+    if organisation_name:
+        indexes["organisation"].add(organisation_name)
+
+
+def suggest(kind, prefix, limit=8):
+    indexes = get_indexes()
+    if kind == "search":
+        # barre de recherche : compétences puis organisations
+        suggestions = indexes["skill"].suggest(prefix, limit)
+        return suggestions + indexes["organisation"].suggest(prefix, limit - len(suggestions))
+    return indexes[kind].suggest(prefix, limit)
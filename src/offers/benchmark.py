@@ -0,0 +1,131 @@
+"""Mesures de performance de la liste publique, du détail d'une offre et de tab_offers.
+
+Pour chaque taille de corpus (offers.corpus), chaque scénario est appelé
+avec le client de test de Django :
+
+- une requête à froid (cache vidé) : latence et nombre de requêtes SQL ;
+- `repeat` requêtes à chaud : percentiles de latence et requêtes SQL ;
+- une requête à froid sous tracemalloc : pic de mémoire Python.
+
+Le corpus est créé dans une transaction annulée à la fin de chaque taille :
+la base est laissée telle qu'elle était. Les lectures restent donc sur
+default (un réplica ne verrait pas ce corpus), et les caches vidés entre les
+mesures sont ceux d'un cache privé au benchmark, pas le cache partagé
+(sessions, états d'envoi des codes 2FA, tokens OAuth).
+"""
+import math
+import platform
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+import django
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from accounts.models import Offer
+
+from .corpus import seed_corpus
+
+# combinaisons q / location typiques de la liste publique
+LIST_SCENARIOS = {
+    "list": {},
+    "list_q": {"q": "python"},
+    "list_location": {"location": "Lyon"},
+    "list_q_location": {"q": "développeur web", "location": "Paris"},
+    "list_country": {"q": "stage", "location": "Allemagne"},
+    "list_typo": {"q": "pyhton"},
+}
+
+# remplace le cache default le temps du benchmark : cache.clear() ne touche qu'à lui
+BENCHMARK_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "mosifra-benchmark"}
+}
+
+
+def percentile(values, fraction):
+    """Percentile au rang le plus proche de valeurs déjà triées."""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))
+    return values[index]
+
+
+def _timed_get(client, url, params):
+    # requêtes de toutes les bases, réplicas compris
+    with ExitStack() as stack:
+        captures = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+        start = time.perf_counter()
+        response = client.get(url, params)
+        elapsed = (time.perf_counter() - start) * 1000
+    return response, elapsed, sum(len(queries) for queries in captures)
+
+
+def measure(client, url, params=None, repeat=20):
+    params = params or {}
+    cache.clear()
+    response, cold_ms, cold_queries = _timed_get(client, url, params)
+
+    timings, warm_queries = [], []
+    for _ in range(repeat):
+        _, elapsed, queries = _timed_get(client, url, params)
+        timings.append(elapsed)
+        warm_queries.append(queries)
+    timings.sort()
+
+    cache.clear()
+    tracemalloc.start()
+    try:
+        client.get(url, params)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "status": response.status_code,
+        "cold_ms": round(cold_ms, 2),
+        "p50_ms": round(percentile(timings, 0.50), 2) if timings else None,
+        "p95_ms": round(percentile(timings, 0.95), 2) if timings else None,
+        "p99_ms": round(percentile(timings, 0.99), 2) if timings else None,
+        "cold_queries": cold_queries,
+        "warm_queries": max(warm_queries, default=None),
+        "peak_memory_kb": round(peak / 1024),
+    }
+
+
+def benchmark_corpus(offers_count, repeat=20, seed=0):
+    """Crée un corpus de `offers_count` offres, mesure chaque scénario puis annule tout."""
+    results = {}
+    with transaction.atomic():
+        users = seed_corpus(offers_count, seed=seed)
+        client = Client()
+        list_url = reverse("offers:list")
+        for name, params in LIST_SCENARIOS.items():
+            results[name] = measure(client, list_url, params, repeat)
+
+        offer_id = Offer.objects.order_by("-created_at", "id").values_list("pk", flat=True).first()
+        results["detail"] = measure(client, reverse("offers:detail_public", kwargs={"pk": offer_id}), repeat=repeat)
+
+        # la première organisation est celle qui publie le plus d'offres (voir CorpusGenerator.offer_owners)
+        client.force_login(users[0])
+        results["tab_offers"] = measure(client, reverse("profiles:tab_offers"), repeat=repeat)
+        transaction.set_rollback(True)
+    cache.clear()
+    return results
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"], CACHES=BENCHMARK_CACHES, DATABASE_ROUTERS=[])
+def run_benchmark(sizes, repeat=20, seed=0):
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "runs": {str(size): benchmark_corpus(size, repeat, seed) for size in sizes},
+    }
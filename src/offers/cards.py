@@ -0,0 +1,147 @@
+"""Read model des cartes d'offres (accounts.OfferCard).
+
+Les cartes recopient les champs affichés de l'offre et de son organisation
+pour que la liste et les pages détail se rendent en une seule requête, sans
+aller chercher company_profile / institution_profile offre par offre.
+
+Le HTML de chaque carte est aussi mis en cache, avec une clé qui contient
+les dates de modification de l'offre et de l'organisation : une carte
+modifiée change simplement de clé.
+
+Le corps de la page détail publique est mis en cache de la même façon :
+la clé contient les dates de modification de l'offre et de l'organisation,
+lues par une requête indexée sur la clé primaire. Une modification change
+la clé, même si le cache n'est pas partagé entre les processus ou si la
+transaction qui l'a faite est encore ouverte.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from accounts.models import CompanyProfile, InstitutionProfile, Offer, OfferCard
+from config.replicas import primary_reads
+
+CARD_OFFER_FIELDS = ("title", "contract_type", "location", "duration", "remote", "created_at", "updated_at")
+CARD_ORGANISATION_FIELDS = (
+    "organisation_name",
+    "organisation_description",
+    "logo_url",
+    "country_code",
+    "organisation_updated_at",
+)
+
+
+def organisation_card_fields(profile):
+    if profile is None:
+        return {
+            "organisation_name": "",
+            "organisation_description": "",
+            "logo_url": "",
+            "country_code": "",
+            "organisation_updated_at": None,
+        }
+    return {
+        "organisation_name": profile.organisation_name,
+        "organisation_description": profile.description,
+        "logo_url": profile.logo.url if profile.logo else "",
+        "country_code": profile.country_code,
+        "organisation_updated_at": profile.updated_at,
+    }
+
+
+def refresh_offer_cards(offers):
+    """(Re)construit les cartes des offres du queryset, en trois requêtes."""
+    offers = list(offers.only("id", "company_id", *CARD_OFFER_FIELDS))
+    company_ids = {offer.company_id for offer in offers}
+    profiles = {profile.user_id: profile for profile in InstitutionProfile.objects.filter(user_id__in=company_ids)}
+    profiles.update({profile.user_id: profile for profile in CompanyProfile.objects.filter(user_id__in=company_ids)})
+    cards = [
+        OfferCard(
+            offer_id=offer.pk,
+            **{name: getattr(offer, name) for name in CARD_OFFER_FIELDS},
+            **organisation_card_fields(profiles.get(offer.company_id)),
+        )
+        for offer in offers
+    ]
+    OfferCard.objects.bulk_create(
+        cards,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["offer"],
+        update_fields=[*CARD_OFFER_FIELDS, *CARD_ORGANISATION_FIELDS],
+    )
+    return cards
+
+
+def refresh_organisation_cards(profile):
+    OfferCard.objects.filter(offer__company_id=profile.user_id).update(**organisation_card_fields(profile))
+
+
+def offer_cards(offers):
+    """Cartes des offres chargées avec select_related("card"), reconstruites si absentes."""
+    missing = [offer.pk for offer in offers if not hasattr(offer, "card")]
+    if missing:
+        rebuilt = {card.offer_id: card for card in refresh_offer_cards(Offer.objects.filter(pk__in=missing))}
+        for offer in offers:
+            if offer.pk in rebuilt:
+                offer.card = rebuilt[offer.pk]
+    return [offer.card for offer in offers if hasattr(offer, "card")]
+
+
+def card_fragment_key(card):
+    organisation_version = card.organisation_updated_at.timestamp() if card.organisation_updated_at else 0
+    return f"offers:card:{card.offer_id}:{card.updated_at.timestamp()}:{organisation_version}"
+
+
+def render_offer_cards(cards):
+    """HTML des cartes, lu en un seul get_many ; seules les cartes absentes du cache sont rendues."""
+    keys = [card_fragment_key(card) for card in cards]
+    cached = cache.get_many(keys)
+    rendered = {}
+    fragments = []
+    for key, card in zip(keys, cards):
+        html = cached.get(key)
+        if html is None:
+            html = render_to_string("offers/partials/offer_card.html", {"card": card})
+            rendered[key] = html
+        fragments.append(html)
+    if rendered:
+        cache.set_many(rendered, settings.OFFERS_CARD_CACHE_TIMEOUT)
+    return mark_safe("".join(fragments))
+
+
+def offer_detail_key(offer_id, updated_at, organisation_updated_at):
+    organisation_version = organisation_updated_at.timestamp() if organisation_updated_at else 0
+    return f"offers:detail:{offer_id}:{updated_at.timestamp()}:{organisation_version}"
+
+
+def cached_offer_detail(offer_id):
+    """
+    {"html": corps de la page détail, "last_modified": timestamp} de l'offre,
+    ou None si elle n'existe pas. Une requête pour la version de l'offre,
+    une requête jointe (offre + carte) de plus sur un défaut de cache.
+    """
+    version = Offer.objects.filter(pk=offer_id).values_list("updated_at", "card__organisation_updated_at").first()
+    if version is None:
+        return None
+    detail = cache.get(offer_detail_key(offer_id, *version))
+    if detail is None:
+        # lu sur default : gardé OFFERS_DETAIL_CACHE_TIMEOUT, il ne doit pas venir d'un réplica en retard
+        with primary_reads():
+            offer = Offer.objects.select_related("card").filter(pk=offer_id).first()
+            if offer is None:
+                return None
+            card = offer_cards([offer])[0]
+            last_modified = max(filter(None, [offer.updated_at, card.organisation_updated_at]))
+            detail = {
+                "html": render_to_string("offers/partials/offer_detail_body.html", {"offer": offer, "card": card}),
+                "last_modified": int(last_modified.timestamp()),
+            }
+        # rangé sous la version lue sur default, qui est celle du rendu
+        cache.set(
+            offer_detail_key(offer_id, offer.updated_at, card.organisation_updated_at),
+            detail,
+            settings.OFFERS_DETAIL_CACHE_TIMEOUT,
+        )
+    return detail
@@ -0,0 +1,229 @@
+"""Corpus synthétique d'offres pour les mesures de performance.
+
+Génère des organisations et des offres au texte français réaliste (titres,
+compétences, villes et pays variés), de façon déterministe à partir d'une
+graine : deux exécutions avec la même graine produisent les mêmes lignes,
+donc des mesures comparables d'un commit à l'autre.
+
+Les lignes sont insérées par bulk_create (seed_corpus) ou par COPY
+(copy_rows, pour `manage.py seed_scale`), sans passer par les signaux :
+les read models (tsvector, cartes, compétences) sont ensuite recalculés
+par lot, comme le ferait une reprise de données.
+"""
+import itertools
+import random
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from accounts.countries import build_location_search
+from accounts.models import CompanyProfile, Offer, User
+
+from .cards import refresh_offer_cards
+from .geo import geocode
+from .search import update_search_vectors
+from .skills import sync_offer_skills
+
+BATCH_SIZE = 2000
+
+ROLES = (
+    "développeur web",
+    "développeur Python",
+    "développeuse full stack",
+    "data analyst",
+    "data scientist",
+    "ingénieur DevOps",
+    "administrateur systèmes et réseaux",
+    "chargé de communication",
+    "assistant marketing digital",
+    "chef de projet junior",
+    "technicien support informatique",
+    "analyste cybersécurité",
+    "UX designer",
+    "comptable",
+    "assistant ressources humaines",
+    "ingénieur qualité",
+)
+SKILLS = (
+    "Python", "Django", "JavaScript", "TypeScript", "React", "Vue.js", "SQL", "PostgreSQL",
+    "Docker", "Kubernetes", "Linux", "Git", "Java", "Spring", "C#", ".NET", "PHP", "Symfony",
+    "Excel", "Power BI", "Figma", "SEO", "Anglais", "Allemand", "Communication", "Gestion de projet",
+)
+# (ville, pays de l'organisation)
+CITIES = (
+    ("Paris", "FR"), ("Lyon", "FR"), ("Marseille", "FR"), ("Toulouse", "FR"), ("Bordeaux", "FR"),
+    ("Lille", "FR"), ("Nantes", "FR"), ("Strasbourg", "FR"), ("Montpellier", "FR"), ("Rennes", "FR"),
+    ("Grenoble", "FR"), ("Bourg-en-Bresse", "FR"), ("Bruxelles", "BE"), ("Liège", "BE"),
+    ("Genève", "CH"), ("Lausanne", "CH"), ("Luxembourg", "LU"), ("Montréal", "CA"),
+    ("Berlin", "DE"), ("Madrid", "ES"),
+)
+ORGANISATION_PREFIXES = ("Groupe", "Société", "Atelier", "Cabinet", "Studio", "Laboratoire", "Agence")
+ORGANISATION_NAMES = (
+    "Acme", "Horizon", "Lumière", "Cassiopée", "Mistral", "Vercors", "Armor", "Garonne",
+    "Azur", "Boréal", "Calanque", "Dauphiné", "Émeraude", "Flandre", "Provence", "Saône",
+)
+SENTENCES = (
+    "Vous rejoindrez une équipe de {size} personnes au sein de notre pôle {team}.",
+    "Vous participerez à la conception et au développement de nouvelles fonctionnalités.",
+    "Vous serez accompagné(e) par un tuteur tout au long de votre {contract}.",
+    "Nous travaillons en méthode agile avec des livraisons toutes les deux semaines.",
+    "Une première expérience avec {skill} serait un plus.",
+    "Vous contribuerez à l'amélioration continue de nos outils internes.",
+    "Le poste est basé à {city}, avec des déplacements ponctuels.",
+    "Vous rédigerez la documentation et présenterez vos travaux à l'équipe.",
+)
+TEAMS = ("produit", "data", "infrastructure", "marketing", "finance", "qualité", "recherche")
+DURATIONS = ("2 mois", "3 mois", "4 mois", "6 mois", "12 mois", "24 mois")
+SALARIES = ("", "Gratification légale", "800 € / mois", "1 100 € / mois", "1 400 € / mois")
+
+
+class CorpusGenerator:
+    """Lignes d'organisations et d'offres, tirées dans l'ordre d'un même random.Random(seed)."""
+
+    def __init__(self, seed=0):
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    def organisation(self, index):
+        city, country_code = self.rng.choice(CITIES)
+        name = f"{self.rng.choice(ORGANISATION_PREFIXES)} {self.rng.choice(ORGANISATION_NAMES)} {index}"
+        return {
+            "email": f"bench-{self.seed}-{index}@entreprise.example",
+            "organisation_name": name,
+            "location": city,
+            "country_code": country_code,
+            "description": f"{name} accompagne ses clients depuis {self.rng.randint(1950, 2020)}.",
+        }
+
+    def offer(self, organisation):
+        rng = self.rng
+        contract_type = rng.choice(Offer.ContractType.values)
+        contract_label = Offer.ContractType(contract_type).label
+        # la plupart des offres sont dans la ville de l'organisation
+        city = organisation["location"] if rng.random() < 0.7 else rng.choice(CITIES)[0]
+        skills = rng.sample(SKILLS, rng.randint(1, 5))
+        context = {
+            "size": rng.randint(3, 40),
+            "team": rng.choice(TEAMS),
+            "contract": contract_label.lower(),
+            "skill": skills[0],
+            "city": city,
+        }
+        sentences = [sentence.format(**context) for sentence in rng.sample(SENTENCES, rng.randint(3, 6))]
+        return {
+            "title": f"{contract_label} {rng.choice(ROLES)}",
+            "contract_type": contract_type,
+            "location": city,
+            "skills": ", ".join(skills),
+            "remote": rng.random() < 0.3,
+            "duration": rng.choice(DURATIONS),
+            "start_date": f"{rng.choice(('Janvier', 'Mars', 'Avril', 'Septembre'))} {rng.choice((2026, 2027))}",
+            "salary": rng.choice(SALARIES),
+            "description": "<p>" + " ".join(sentences) + "</p>",
+        }
+
+    def iter_offer_owners(self, offers_count, organisations_count, chunk_size=BATCH_SIZE):
+        """
+        Index d'organisation de chaque offre, par paquets de `chunk_size` :
+        quelques grosses organisations, beaucoup de petites.
+        """
+        cum_weights = list(itertools.accumulate(1 / (index + 1) for index in range(organisations_count)))
+        for start in range(0, offers_count, chunk_size):
+            k = min(chunk_size, offers_count - start)
+            yield self.rng.choices(range(organisations_count), cum_weights=cum_weights, k=k)
+
+    def offer_owners(self, offers_count, organisations_count):
+        return list(itertools.chain.from_iterable(self.iter_offer_owners(offers_count, organisations_count)))
+
+
+def copy_rows(model, rows, using="default"):
+    """
+    Insère `rows` (dicts {attname: valeur}) avec COPY ... FROM STDIN, en flux :
+    les lignes sont consommées une à une, la mémoire ne dépend pas de leur
+    nombre. Les champs absents prennent leur valeur par défaut (auto_now :
+    maintenant). Retourne le nombre de lignes copiées.
+    """
+    connection = connections[using]
+    fields = [field for field in model._meta.concrete_fields if field is not model._meta.auto_field]
+    now = timezone.now()
+    defaults = {field.attname: _copy_default(field, now) for field in fields}
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    sql = f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN"
+    count = 0
+    with connection.cursor() as cursor, cursor.cursor.copy(sql) as copy:
+        for row in rows:
+            copy.write_row([row.get(field.attname, defaults[field.attname]) for field in fields])
+            count += 1
+    return count
+
+
+def _copy_default(field, now):
+    if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+        return now
+    if field.has_default():
+        return field.get_default()
+    if field.null:
+        return None
+    return ""
+
+
+def refresh_offer_read_models(offers):
+    """Recalcule tsvector, cartes et compétences d'offres insérées sans signaux (attributs id et skills)."""
+    queryset = Offer.objects.filter(pk__in=[offer.pk for offer in offers])
+    update_search_vectors(queryset)
+    refresh_offer_cards(queryset)
+    sync_offer_skills(offers)
+
+
+def _batches(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+@transaction.atomic
+def seed_corpus(offers_count, organisations_count=None, seed=0):
+    """Crée les organisations et les offres du corpus, retourne les utilisateurs des organisations."""
+    organisations_count = organisations_count or max(1, offers_count // 20)
+    generator = CorpusGenerator(seed)
+    organisations = [generator.organisation(index) for index in range(organisations_count)]
+
+    users = User.objects.bulk_create(
+        [
+            User(username=row["email"], email=row["email"], role=User.Role.COMPANY, is_verified=True, password="!")
+            for row in organisations
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    CompanyProfile.objects.bulk_create(
+        [
+            CompanyProfile(
+                user=user,
+                is_approved=True,
+                **{name: row[name] for name in ("organisation_name", "location", "country_code", "description")},
+            )
+            for user, row in zip(users, organisations)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    coordinates = {}
+    owners = generator.offer_owners(offers_count, organisations_count)
+    for chunk in _batches(owners):
+        offers = []
+        for owner in chunk:
+            row = generator.offer(organisations[owner])
+            key = (row["location"], organisations[owner]["country_code"])
+            if key not in coordinates:
+                coordinates[key] = geocode(*key)
+            offers.append(
+                Offer(
+                    company=users[owner],
+                    location_search=build_location_search(*key),
+                    latitude=coordinates[key][0],
+                    longitude=coordinates[key][1],
+                    **row,
+                )
+            )
+        Offer.objects.bulk_create(offers)
+        refresh_offer_read_models(offers)
+    return users
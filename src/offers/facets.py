@@ -0,0 +1,146 @@
+"""Facettes de la liste des offres (type de contrat, télétravail, pays, ville).
+
+Les comptes sont calculés par PostgreSQL en une seule requête
+`GROUP BY GROUPING SETS` sur les offres qui correspondent à q / location,
+puis mis en cache par recherche normalisée (invalidé avec la génération
+de offers.search_cache).
+"""
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import F
+
+from accounts.countries import get_country_choices
+from accounts.models import Offer
+
+from .search import normalize_query
+from .search_cache import current_generation
+
+# nom du paramètre GET -> champ filtré
+FACETS = {
+    "contract_type": "contract_type",
+    "remote": "remote",
+    "country": "card__country_code",
+    "city": "card__location",
+}
+
+FACET_TITLES = {
+    "contract_type": "Contrat",
+    "remote": "Télétravail",
+    "country": "Pays",
+    "city": "Ville",
+}
+
+FACET_VALUES_LIMIT = 10
+
+
+def compute_facets(offers):
+    """{facette: [(valeur, nombre d'offres), ...]} triés par nombre décroissant."""
+    columns = {f"facet_{name}": F(lookup) for name, lookup in FACETS.items()}
+    try:
+        sql, params = offers.order_by().values(**columns).query.sql_with_params()
+    except EmptyResultSet:
+        return {name: [] for name in FACETS}
+    aliases = [f'"{alias}"' for alias in columns]
+    groupings = ", ".join(f"GROUPING({alias})" for alias in aliases)
+    grouping_sets = ", ".join(f"({alias})" for alias in aliases)
+    with connections[offers.db].cursor() as cursor:
+        cursor.execute(
+            f"SELECT {', '.join(aliases)}, {groupings}, COUNT(*) FROM ({sql}) AS filtered "
+            f"GROUP BY GROUPING SETS ({grouping_sets})",
+            params,
+        )
+        rows = cursor.fetchall()
+
+    names = list(FACETS)
+    facets = {name: [] for name in names}
+    for row in rows:
+        values, grouped, count = row[: len(names)], row[len(names) : -1], row[-1]
+        # GROUPING(col) vaut 0 pour la colonne de l'ensemble courant
+        index = grouped.index(0)
+        if values[index] in (None, ""):
+            continue
+        facets[names[index]].append((values[index], count))
+    for name in names:
+        facets[name].sort(key=lambda item: (-item[1], str(item[0])))
+        del facets[name][FACET_VALUES_LIMIT:]
+    return facets
+
+
+def facets_cache_key(query, location, filters=()):
+    # filters : autres restrictions appliquées avant les facettes (compétences, rayon)
+    raw = "|".join([normalize_query(query), normalize_query(location), *filters])
+    digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return f"offers:facets:{current_generation()}:{digest}"
+
+
+def cached_facets(offers, query, location, filters=()):
+    return cache.get_or_set(
+        facets_cache_key(query, location, filters),
+        lambda: compute_facets(offers),
+        settings.OFFERS_FACETS_CACHE_TIMEOUT,
+    )
+
+
+def facet_label(name, value):
+    if name == "contract_type":
+        # valeur hors des choix (donnée ancienne ou importée) : affichée telle quelle
+        return dict(Offer.ContractType.choices).get(value, value)
+    if name == "remote":
+        return "Télétravail" if value else "Sur site"
+    if name == "country":
+        return dict(get_country_choices()).get(value, value)
+    return value
+
+
+def facet_param(name, value):
+    if name == "remote":
+        return "1" if value else "0"
+    return str(value)
+
+
+def apply_facet_filters(offers, params):
+    """Applique les facettes sélectionnées (paramètres GET) au queryset."""
+    for name, lookup in FACETS.items():
+        value = params.get(name, "").strip()
+        if not value:
+            continue
+        if name == "remote":
+            if value not in ("0", "1"):
+                continue
+            offers = offers.filter(remote=value == "1")
+        else:
+            offers = offers.filter(**{lookup: value})
+    return offers
+
+
+def selected_facets(params):
+    return {name: params.get(name, "").strip() for name in FACETS if params.get(name, "").strip()}
+
+
+def facet_links(facets, base_params, selected):
+    """Prépare les facettes pour le template : libellé, compte et lien qui (dé)sélectionne la valeur."""
+    links = []
+    for name, values in facets.items():
+        items = []
+        for value, count in values:
+            param = facet_param(name, value)
+            params = {**base_params, **selected}
+            active = selected.get(name) == param
+            if active:
+                params.pop(name)
+            else:
+                params[name] = param
+            items.append({
+                "label": facet_label(name, value),
+                "count": count,
+                "active": active,
+                "query": urlencode(params),
+            })
+        if items:
+            links.append({"name": name, "title": FACET_TITLES[name], "values": items})
+    return links
@@ -0,0 +1,119 @@
+"""Géocodage hors ligne des offres et recherche "à moins de N km de <ville>".
+
+Les coordonnées viennent de la table City (gazetteer GeoNames chargé par
+`manage.py load_gazetteer`), aucun appel réseau. La recherche par rayon
+filtre d'abord sur le rectangle englobant du cercle, servi par l'index
+(latitude, longitude) des offres, puis ne calcule la distance exacte
+(haversine) que pour les offres de ce rectangle.
+"""
+import math
+import re
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+from accounts.countries import normalize_search_text, resolve_country_codes
+from accounts.models import City, Offer
+
+EARTH_RADIUS_KM = 6371.0
+MAX_RADIUS_KM = 500
+
+# "Lyon 3e (69)", "Paris - La Défense", "Berlin, Allemagne" -> candidats "lyon 3e", "lyon", ...
+_SEPARATORS_RE = re.compile(r"[,;/(\-–]")
+
+
+def _candidates(location):
+    location = normalize_search_text(location).strip()
+    candidates = [location]
+    for part in _SEPARATORS_RE.split(location):
+        part = part.strip(" )")
+        if part and part not in candidates:
+            candidates.append(part)
+    return candidates
+
+
+# pays écrit après une virgule ou entre parenthèses, jamais un morceau de nom composé :
+# "Saint-Denis-de-la-Réunion" ne doit pas donner "de" -> DE ni "la" -> LA
+_COUNTRY_SEPARATORS_RE = re.compile(r"[,;/(]")
+
+
+def _written_country_codes(location):
+    parts = _COUNTRY_SEPARATORS_RE.split(normalize_search_text(location))
+    if len(parts) < 2:
+        return frozenset()
+    country = parts[-1].strip(" )")
+    # noms complets seulement ("usa", "allemagne") : "69" ou "ca" sont des départements ou des abréviations
+    if len(country) <= 2:
+        return frozenset()
+    return resolve_country_codes(country)
+
+
+def find_city(location, country_code=""):
+    """Ville la plus peuplée portant ce nom, de préférence dans le pays donné."""
+    candidates = [name for name in _candidates(location or "") if name]
+    if not candidates:
+        return None
+    cities = list(City.objects.filter(search_name__in=candidates).order_by("-population")[:50])
+    if not cities:
+        return None
+    # "Berlin, Allemagne", "Paris (USA)" : un pays écrit dans le lieu l'emporte sur celui de l'organisation
+    preferred = _written_country_codes(location) or {country_code}
+
+    def score(city):
+        return (candidates.index(city.search_name), city.country_code not in preferred, -city.population)
+
+    return min(cities, key=score)
+
+
+def geocode(location, country_code=""):
+    city = find_city(location, country_code)
+    return (city.latitude, city.longitude) if city else (None, None)
+
+
+def update_coordinates(offers, country_code):
+    """Recalcule les coordonnées des offres d'une même organisation."""
+    offers = list(offers.only("id", "location"))
+    for offer in offers:
+        offer.latitude, offer.longitude = geocode(offer.location, country_code)
+    Offer.objects.bulk_update(offers, ["latitude", "longitude"], batch_size=1000)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(lat_min, lat_max, lng_min, lng_max) du rectangle qui contient le cercle."""
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    lat_min, lat_max = latitude - delta_lat, latitude + delta_lat
+    if lat_min <= -90 or lat_max >= 90:
+        # le cercle contient un pôle : toutes les longitudes
+        return max(lat_min, -90.0), min(lat_max, 90.0), -180.0, 180.0
+    # longitude extrême atteinte par le cercle (pas sur le parallèle du centre)
+    ratio = math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude))
+    if ratio >= 1:
+        return lat_min, lat_max, -180.0, 180.0
+    delta_lng = math.degrees(math.asin(ratio))
+    return lat_min, lat_max, max(longitude - delta_lng, -180.0), min(longitude + delta_lng, 180.0)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    dlat, dlng = math.radians(lat2 - lat1), math.radians(lng2 - lng1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _distance_expression(latitude, longitude):
+    dlat = Radians(F("latitude") - Value(latitude)) / 2
+    dlng = Radians(F("longitude") - Value(longitude)) / 2
+    a = Power(Sin(dlat), 2) + Cos(Radians(Value(latitude))) * Cos(Radians(F("latitude"))) * Power(Sin(dlng), 2)
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a, output_field=FloatField()))
+
+
+def filter_near(offers, city_name, radius_km):
+    """Offres à moins de `radius_km` de la ville ; aucune si la ville est inconnue."""
+    city = find_city(city_name)
+    if city is None:
+        return offers.none()
+    radius_km = min(radius_km, MAX_RADIUS_KM)
+    lat_min, lat_max, lng_min, lng_max = bounding_box(city.latitude, city.longitude, radius_km)
+    return offers.filter(
+        latitude__range=(lat_min, lat_max),
+        longitude__range=(lng_min, lng_max),
+    ).alias(distance=_distance_expression(city.latitude, city.longitude)).filter(distance__lte=radius_km)
@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from offers.benchmark import run_benchmark
+
+
+def _sizes(value):
+    try:
+        sizes = [int(size) for size in value.split(",") if size.strip()]
+    except ValueError as error:
+        raise CommandError(f"Tailles invalides : {value}") from error
+    if not sizes or min(sizes) < 1:
+        raise CommandError(f"Tailles invalides : {value}")
+    return sizes
+
+
+class Command(BaseCommand):
+    help = "Mesure la liste des offres, le détail et tab_offers sur des corpus synthétiques."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000", help="Nombres d'offres, séparés par des virgules.")
+        parser.add_argument("--repeat", type=int, default=20, help="Requêtes à chaud par scénario.")
+        parser.add_argument("--seed", type=int, default=0, help="Graine du corpus synthétique.")
+        parser.add_argument("--output", default="benchmark.json", help="Fichier JSON des résultats.")
+
+    def handle(self, *args, sizes, repeat, seed, output, **options):
+        results = run_benchmark(_sizes(sizes), repeat=repeat, seed=seed)
+        # clés triées et indentation fixe : deux fichiers se comparent avec un simple diff
+        with open(output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+
+        for size, scenarios in results["runs"].items():
+            self.stdout.write(f"{size} offres")
+            for name, metrics in sorted(scenarios.items()):
+                self.stdout.write(
+                    f"  {name:<18} p50 {metrics['p50_ms']} ms  p95 {metrics['p95_ms']} ms  "
+                    f"{metrics['cold_queries']} requêtes à froid  {metrics['peak_memory_kb']} Ko"
+                )
+        self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {output}."))
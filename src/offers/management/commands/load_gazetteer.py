@@ -0,0 +1,91 @@
+import csv
+import io
+import sys
+import zipfile
+from contextlib import ExitStack, contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.countries import normalize_search_text
+from accounts.models import City, CompanyProfile, InstitutionProfile, Offer
+from offers.geo import geocode
+from offers.search_cache import bump_generation
+
+# colonnes du format GeoNames (cities500.txt, cities1000.txt, ...)
+GEONAME_ID, NAME, LATITUDE, LONGITUDE, COUNTRY_CODE, POPULATION = 0, 1, 4, 5, 8, 14
+
+BATCH_SIZE = 5000
+
+
+@contextmanager
+def _open_rows(path):
+    with ExitStack() as stack:
+        if path.endswith(".zip"):
+            archive = stack.enter_context(zipfile.ZipFile(path))
+            names = [name for name in archive.namelist() if name.endswith(".txt")]
+            if not names:
+                raise CommandError(f"Aucun fichier .txt dans {path}.")
+            handle = stack.enter_context(io.TextIOWrapper(archive.open(names[0]), encoding="utf-8"))
+        else:
+            handle = stack.enter_context(open(path, encoding="utf-8"))
+        csv.field_size_limit(sys.maxsize)
+        yield csv.reader(handle, delimiter="\t", quoting=csv.QUOTE_NONE)
+
+
+def _city(row):
+    return City(
+        geoname_id=int(row[GEONAME_ID]),
+        name=row[NAME][:200],
+        search_name=normalize_search_text(row[NAME])[:200],
+        country_code=row[COUNTRY_CODE][:2],
+        latitude=float(row[LATITUDE]),
+        longitude=float(row[LONGITUDE]),
+        population=int(row[POPULATION] or 0),
+    )
+
+
+class Command(BaseCommand):
+    help = "Charge un fichier de villes GeoNames (cities500.txt ou .zip) et géocode les offres."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Fichier GeoNames téléchargé au préalable (aucun accès réseau).")
+        parser.add_argument("--keep", action="store_true", help="Ne pas vider la table des villes avant le chargement.")
+
+    def handle(self, *args, path, keep, **options):
+        loaded = 0
+        try:
+            with _open_rows(path) as rows, transaction.atomic():
+                if not keep:
+                    City.objects.all().delete()
+                batch = []
+                for row in rows:
+                    if len(row) <= POPULATION:
+                        continue
+                    batch.append(_city(row))
+                    if len(batch) >= BATCH_SIZE:
+                        City.objects.bulk_create(batch, ignore_conflicts=keep)
+                        loaded += len(batch)
+                        batch = []
+                City.objects.bulk_create(batch, ignore_conflicts=keep)
+                loaded += len(batch)
+        except OSError as error:
+            raise CommandError(str(error)) from error
+        self.stdout.write(f"{loaded} villes chargées.")
+
+        # les offres existantes sont géocodées avec le nouveau gazetteer :
+        # pays de toutes les organisations en deux requêtes, un géocodage par (lieu, pays)
+        countries = dict(InstitutionProfile.objects.values_list("user_id", "country_code"))
+        countries.update(CompanyProfile.objects.values_list("user_id", "country_code"))
+        offers = list(Offer.objects.only("id", "location", "company_id"))
+        coordinates = {}
+        for offer in offers:
+            key = (offer.location, countries.get(offer.company_id) or "")
+            if key not in coordinates:
+                coordinates[key] = geocode(*key)
+            offer.latitude, offer.longitude = coordinates[key]
+        Offer.objects.bulk_update(offers, ["latitude", "longitude"], batch_size=1000)
+        # bulk_update n'envoie pas de signal : les recherches "près de" en cache sont périmées
+        bump_generation()
+        located = sum(offer.latitude is not None for offer in offers)
+        self.stdout.write(self.style.SUCCESS(f"{located}/{len(offers)} offres géocodées."))
@@ -0,0 +1,235 @@
+import hashlib
+import time
+import uuid
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.countries import build_location_search
+from accounts.models import CompanyProfile, InstitutionProfile, Offer, StudentInvitation, StudentProfile, User
+from offers.corpus import CITIES, CorpusGenerator, copy_rows, refresh_offer_read_models
+from offers.geo import geocode
+from offers.search_cache import bump_generation
+
+CHUNK_SIZE = 5000
+
+FILIERES = ("Informatique", "GEA", "TC", "MMI", "GEII", "Chimie", "Génie civil", "Réseaux et télécoms")
+LEVELS = ("BUT 1", "BUT 2", "BUT 3", "Licence pro", "Master 1", "Master 2")
+ACADEMIC_YEARS = ("2025-2026", "2026-2027")
+FIRST_NAMES = ("Camille", "Léa", "Hugo", "Louis", "Chloé", "Inès", "Lucas", "Manon", "Nathan", "Sarah", "Yanis", "Zoé")
+LAST_NAMES = ("Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau")
+INSTITUTION_PREFIXES = ("IUT de", "Université de", "Lycée polytechnique de", "École d'ingénieurs de")
+INVITATION_STATUSES = (
+    StudentInvitation.Status.PENDING,
+    StudentInvitation.Status.SENT,
+    StudentInvitation.Status.SENT,
+    StudentInvitation.Status.USED,
+    StudentInvitation.Status.EXPIRED,
+)
+
+# deux ans d'historique, en secondes
+HISTORY = 2 * 365 * 86400
+# origine des dates générées : fixe, pour que la même graine donne les mêmes lignes d'un jour à l'autre
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class ScaleSeeder:
+    """
+    Lignes de toutes les tables, tirées d'un même random.Random(seed), dates
+    comprises (comptées depuis EPOCH, pas depuis l'heure du chargement).
+
+    Chaque méthode rows_* est un générateur consommé directement par COPY.
+    Les ids sont des uuid5 dérivés de (graine, type, rang) : les clés
+    étrangères se recalculent sans garder les lignes en mémoire. Seuls la
+    ville et le pays de chaque organisation sont conservés, pour ses offres.
+    """
+
+    def __init__(self, seed, password):
+        self.seed = seed
+        self.password = password
+        self.corpus = CorpusGenerator(seed)
+        self.rng = self.corpus.rng
+        self.now = EPOCH + timedelta(days=seed % 365)
+        self.company_locations = []
+        self.locations = {}
+
+    def row_id(self, kind, index):
+        return uuid.uuid5(uuid.NAMESPACE_URL, f"mosifra-seed:{self.seed}:{kind}:{index}")
+
+    def email(self, kind, index):
+        return f"scale-{self.seed}-{kind}-{index}@mosifra.example"
+
+    def location(self, city, country_code):
+        # quelques dizaines de couples (ville, pays) : chacun n'est géocodé qu'une fois
+        key = (city, country_code)
+        if key not in self.locations:
+            self.locations[key] = build_location_search(city, country_code), geocode(city, country_code)
+        return self.locations[key]
+
+    def _past(self):
+        return self.now - timedelta(seconds=self.rng.randrange(HISTORY))
+
+    def rows_users(self, kind, count, role):
+        for index in range(count):
+            email = self.email(kind, index)
+            row = {
+                "id": self.row_id(kind, index),
+                "password": self.password,
+                "username": email,
+                "email": email,
+                "role": role,
+                "is_verified": True,
+                "date_joined": self._past(),
+            }
+            if role == User.Role.STUDENT:
+                row["first_name"] = self.rng.choice(FIRST_NAMES)
+                row["last_name"] = self.rng.choice(LAST_NAMES)
+            yield row
+
+    def rows_company_profiles(self, count):
+        for index in range(count):
+            organisation = self.corpus.organisation(index)
+            self.company_locations.append((organisation["location"], organisation["country_code"]))
+            yield {
+                "user_id": self.row_id("company", index),
+                "is_approved": True,
+                **{name: organisation[name] for name in ("organisation_name", "location", "country_code", "description")},
+            }
+
+    def rows_institution_profiles(self, count):
+        for index in range(count):
+            city, country_code = self.rng.choice(CITIES)
+            yield {
+                "user_id": self.row_id("institution", index),
+                "organisation_name": f"{self.rng.choice(INSTITUTION_PREFIXES)} {city}",
+                "location": city,
+                "country_code": country_code,
+                "is_approved": True,
+            }
+
+    def _studies(self):
+        return {
+            "filiere": self.rng.choice(FILIERES),
+            "level": self.rng.choice(LEVELS),
+            "academic_year": self.rng.choice(ACADEMIC_YEARS),
+        }
+
+    def rows_student_profiles(self, count, institutions_count):
+        for index in range(count):
+            yield {
+                "user_id": self.row_id("student", index),
+                "institution_id": self.row_id("institution", self.rng.randrange(institutions_count)),
+                "created_at": self._past(),
+                **self._studies(),
+            }
+
+    def rows_invitations(self, count, institutions_count):
+        for index in range(count):
+            created_at = self._past()
+            status = self.rng.choice(INVITATION_STATUSES)
+            yield {
+                "id": self.row_id("invitation", index),
+                "institution_id": self.row_id("institution", self.rng.randrange(institutions_count)),
+                "email": f"invite-{self.seed}-{index}@etudiant.example",
+                "first_name": self.rng.choice(FIRST_NAMES),
+                "last_name": self.rng.choice(LAST_NAMES),
+                "status": status,
+                "token": hashlib.sha256(f"{self.seed}:{index}".encode()).hexdigest(),
+                "expires_at": created_at + timedelta(days=14),
+                "sent_at": None if status == StudentInvitation.Status.PENDING else created_at,
+                "created_at": created_at,
+                **self._studies(),
+            }
+
+    def offer_chunks(self, count, chunk_size):
+        """Paquets de lignes d'offres, pour recalculer leurs read models au fil du chargement."""
+        index = 0
+        for owners in self.corpus.iter_offer_owners(count, len(self.company_locations), chunk_size):
+            rows = []
+            for owner in owners:
+                city, country_code = self.company_locations[owner]
+                row = self.corpus.offer({"location": city})
+                location_search, (latitude, longitude) = self.location(row["location"], country_code)
+                created_at = self._past()
+                rows.append(
+                    {
+                        "id": self.row_id("offer", index),
+                        "company_id": self.row_id("company", owner),
+                        "location_search": location_search,
+                        "latitude": latitude,
+                        "longitude": longitude,
+                        "created_at": created_at,
+                        "updated_at": created_at,
+                        **row,
+                    }
+                )
+                index += 1
+            yield rows
+
+
+class Command(BaseCommand):
+    help = "Remplit la base avec un grand volume de données synthétiques, chargées par COPY."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--companies", type=int, default=20000)
+        parser.add_argument("--institutions", type=int, default=2000)
+        parser.add_argument("--students", type=int, default=200000)
+        parser.add_argument("--invitations", type=int, default=100000)
+        parser.add_argument("--offers", type=int, default=500000)
+        parser.add_argument("--seed", type=int, default=0, help="Même graine, mêmes lignes.")
+        parser.add_argument("--password", default="mosifra", help="Mot de passe de tous les comptes générés.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Offres par paquet de read models.")
+
+    def _step(self, label, func, *args):
+        start = time.monotonic()
+        count = func(*args)
+        self.stdout.write(f"{label} : {count} lignes en {time.monotonic() - start:.1f} s")
+        return count
+
+    def handle(self, *args, companies, institutions, students, invitations, offers, seed, password, chunk_size, **options):
+        if offers and not companies:
+            raise CommandError("--offers demande au moins une entreprise (--companies).")
+        if (students or invitations) and not institutions:
+            raise CommandError("--students et --invitations demandent au moins un établissement (--institutions).")
+        if User.objects.filter(username__startswith=f"scale-{seed}-").exists():
+            raise CommandError(f"La graine {seed} a déjà été chargée, choisissez-en une autre (--seed).")
+
+        # un seul hachage pour tous les comptes : PBKDF2 par ligne prendrait des heures
+        seeder = ScaleSeeder(seed, make_password(password))
+        start = time.monotonic()
+        total = 0
+        with transaction.atomic():
+            for kind, count, role in (
+                ("company", companies, User.Role.COMPANY),
+                ("institution", institutions, User.Role.INSTITUTION),
+                ("student", students, User.Role.STUDENT),
+            ):
+                total += self._step(f"Utilisateurs ({kind})", copy_rows, User, seeder.rows_users(kind, count, role))
+            total += self._step("Entreprises", copy_rows, CompanyProfile, seeder.rows_company_profiles(companies))
+            total += self._step(
+                "Établissements", copy_rows, InstitutionProfile, seeder.rows_institution_profiles(institutions)
+            )
+            if students:
+                total += self._step(
+                    "Étudiants", copy_rows, StudentProfile, seeder.rows_student_profiles(students, institutions)
+                )
+            if invitations:
+                total += self._step(
+                    "Invitations", copy_rows, StudentInvitation, seeder.rows_invitations(invitations, institutions)
+                )
+            if offers:
+                total += self._step("Offres", self._copy_offers, seeder, offers, chunk_size)
+        bump_generation()
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(f"{total} lignes chargées en {elapsed:.1f} s."))
+
+    def _copy_offers(self, seeder, count, chunk_size):
+        copied = 0
+        for rows in seeder.offer_chunks(count, chunk_size):
+            copied += copy_rows(Offer, rows)
+            # tsvector, cartes et compétences, sans les signaux ; seuls id et skills sont lus
+            refresh_offer_read_models([Offer(pk=row["id"], skills=row["skills"]) for row in rows])
+        return copied
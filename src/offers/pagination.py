@@ -0,0 +1,83 @@
+"""Pagination par curseur (keyset) pour les listes d'offres.
+
+Au lieu d'un OFFSET, le curseur contient les valeurs de tri de la dernière
+offre affichée et la page suivante repart de là avec un WHERE servi par
+l'index (created_at DESC, id). Le coût d'une page ne dépend donc pas de
+sa position dans le catalogue.
+"""
+import json
+import uuid
+from datetime import datetime
+
+from django.core import signing
+from django.db import connections
+from django.db.models import Q
+
+CURSOR_SALT = "offers.pagination.cursor"
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        # isoformat garde les microsecondes, nécessaires pour l'égalité stricte
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+class KeysetPaginator:
+    def __init__(self, ordering, page_size):
+        # ordering : champs de tri à la manière de order_by, le dernier doit être unique
+        self.ordering = list(ordering)
+        self.page_size = page_size
+        self.fields = [(name.lstrip("-"), name.startswith("-")) for name in self.ordering]
+
+    def encode_cursor(self, item):
+        values = [_encode_value(getattr(item, name)) for name, _ in self.fields]
+        return signing.dumps(values, salt=CURSOR_SALT)
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            values = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return None
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            return None
+        return values
+
+    def _after(self, values):
+        # (a, b, c) après (va, vb, vc) : a < va OU (a = va ET b < vb) OU ...
+        condition = Q()
+        for index, (name, descending) in enumerate(self.fields):
+            step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[index]})
+            for previous_index, (previous_name, _) in enumerate(self.fields[:index]):
+                step &= Q(**{previous_name: values[previous_index]})
+            condition |= step
+        return condition
+
+    def paginate(self, queryset, cursor=None):
+        """Retourne (offres de la page, curseur de la page suivante ou None)."""
+        queryset = queryset.order_by(*self.ordering)
+        values = self.decode_cursor(cursor)
+        if values is not None:
+            queryset = queryset.filter(self._after(values))
+        items = list(queryset[: self.page_size + 1])
+        next_cursor = None
+        if len(items) > self.page_size:
+            items = items[: self.page_size]
+            next_cursor = self.encode_cursor(items[-1])
+        return items, next_cursor
+
+
+def estimate_count(queryset):
+    """Nombre de lignes estimé par le planificateur, sans parcourir les résultats."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    # même base que le queryset (réplica compris, config.replicas)
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
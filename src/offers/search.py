@@ -0,0 +1,175 @@
+"""Recherche plein texte des offres (PostgreSQL).
+
+Chaque offre garde un tsvector (`Offer.search_vector`) recalculé à la
+sauvegarde de l'offre ou du profil de l'organisation (voir offers.signals).
+La recherche passe par l'index GIN au lieu de six `icontains`.
+
+Quand elle ne trouve rien (faute de frappe, "pyhton"), on retombe sur une
+recherche approchée par trigrammes (pg_trgm), elle aussi servie par des
+index GIN, qui fournit aussi la suggestion "Vouliez-vous dire".
+"""
+import difflib
+import math
+import re
+from contextlib import contextmanager
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Extract, Greatest, Ln
+
+from accounts.countries import build_location_search, normalize_search_text
+from accounts.models import CompanyProfile, InstitutionProfile, Offer, OfferCard
+
+# créée dans la migration accounts.0007 (french + unaccent)
+SEARCH_CONFIG = "french_unaccent"
+
+_TERM_RE = re.compile(r"\w+")
+
+# champs comparés par trigrammes, chacun avec un index gin_trgm_ops
+FUZZY_FIELDS = ("title", "skills", "card__organisation_name")
+FUZZY_OFFER_FIELDS = ("title", "skills")
+# seuil de l'opérateur %> (0.6 par défaut dans pg_trgm, trop strict pour "pyhton")
+FUZZY_THRESHOLD = 0.25
+
+# bonus de fraîcheur : une offre publiée RECENCY_HALF_LIFE_DAYS plus tard
+# vaut une offre deux fois plus pertinente
+RECENCY_HALF_LIFE_DAYS = 60
+
+
+def organisation_name_expression():
+    """Nom de l'organisation qui publie l'offre, utilisable dans un UPDATE."""
+    return Coalesce(
+        Subquery(CompanyProfile.objects.filter(user=OuterRef("company")).values("organisation_name")[:1]),
+        Subquery(InstitutionProfile.objects.filter(user=OuterRef("company")).values("organisation_name")[:1]),
+        Value(""),
+    )
+
+
+def offer_search_vector():
+    # poids : titre (A) > compétences (B) > organisation (C) > reste (D)
+    return (
+        SearchVector("title", config=SEARCH_CONFIG, weight="A")
+        + SearchVector("skills", config=SEARCH_CONFIG, weight="B")
+        + SearchVector(organisation_name_expression(), config=SEARCH_CONFIG, weight="C")
+        + SearchVector("contract_type", "description", config=SEARCH_CONFIG, weight="D")
+    )
+
+
+def update_search_vectors(offers):
+    """Recalcule le tsvector des offres du queryset en une seule requête."""
+    return offers.update(search_vector=offer_search_vector())
+
+
+def normalize_query(text):
+    """Forme canonique d'une saisie (minuscules, sans accents ni ponctuation)."""
+    return " ".join(_TERM_RE.findall(normalize_search_text(text)))
+
+
+def build_search_query(text):
+    # chaque mot est cherché en préfixe pour garder le comportement "pendant la frappe"
+    terms = _TERM_RE.findall(text.lower())
+    if not terms:
+        return None
+    raw = " & ".join(f"{term}:*" for term in terms)
+    return SearchQuery(raw, config=SEARCH_CONFIG, search_type="raw")
+
+
+def search_offers(offers, text):
+    """Filtre les offres sur `text` et annote leur pertinence (`rank`)."""
+    query = build_search_query(text)
+    if query is None:
+        return offers
+    # ts_rank renvoie un real : en double precision la valeur revient telle quelle
+    # dans le curseur de pagination et reste comparable à l'identique
+    rank = Cast(SearchRank(F("search_vector"), query), FloatField())
+    return offers.filter(search_vector=query).annotate(rank=rank, score=relevance_score())
+
+
+@contextmanager
+def trigram_threshold(using=DEFAULT_DB_ALIAS):
+    """
+    Abaisse le seuil de %> à FUZZY_THRESHOLD pour le bloc. SET LOCAL : le
+    réglage disparaît avec la transaction et ne suit pas la connexion dans
+    les requêtes suivantes ; les résultats de fuzzy_search_offers doivent
+    donc être lus dans le bloc.
+    """
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", [str(FUZZY_THRESHOLD)])
+        yield
+
+
+def fuzzy_search_offers(offers, text):
+    """Recherche tolérante aux fautes (dans un bloc trigram_threshold), annote la similarité comme `rank`."""
+    text = text.strip()
+    # un OR entre accounts_offer et accounts_offercard ne peut pas combiner leurs index GIN :
+    # une requête indexée par table, réunies par UNION
+    offer_condition = Q()
+    for field in FUZZY_OFFER_FIELDS:
+        offer_condition |= Q(**{f"{field}__trigram_word_similar": text})
+    matching = (
+        Offer.objects.filter(offer_condition)
+        .values("pk")
+        .union(OfferCard.objects.filter(organisation_name__trigram_word_similar=text).values("offer_id"))
+    )
+    rank = Cast(Greatest(*(TrigramWordSimilarity(text, field) for field in FUZZY_FIELDS)), FloatField())
+    return offers.filter(pk__in=matching).annotate(rank=rank, score=relevance_score())
+
+
+def relevance_score():
+    """
+    Pertinence avec bonus de fraîcheur, à annoter après `rank`.
+
+    rank * 2^(âge / demi-vie) ne donne pas le même ordre d'un jour à l'autre ;
+    son logarithme, ln(rank) + ln(2) * epoch(created_at) / demi-vie, donne le
+    même ordre et ne dépend pas de l'heure de la requête : le tri se fait en
+    base (ORDER BY score LIMIT n) et les curseurs de pagination restent valides.
+    """
+    half_life = RECENCY_HALF_LIFE_DAYS * 86400 / math.log(2)
+    return Cast(
+        Ln(F("rank") + Value(1e-6)) + Cast(Extract("created_at", "epoch"), FloatField()) / Value(half_life),
+        FloatField(),
+    )
+
+
+def suggest_query(fuzzy_offers, text, limit=20):
+    """
+    Corrige chaque mot de `text` avec le vocabulaire des meilleures offres
+    trouvées par fuzzy_search_offers. Retourne None si rien n'a changé.
+    """
+    vocabulary = {}
+    for row in fuzzy_offers.order_by("-rank").values_list(*FUZZY_FIELDS)[:limit]:
+        for value in row:
+            for word in _TERM_RE.findall((value or "").lower()):
+                vocabulary.setdefault(normalize_search_text(word), word)
+    terms = _TERM_RE.findall(text.lower())
+    corrected = []
+    for term in terms:
+        matches = difflib.get_close_matches(normalize_search_text(term), vocabulary, n=1, cutoff=0.6)
+        corrected.append(vocabulary[matches[0]] if matches else term)
+    if corrected == terms:
+        return None
+    return " ".join(corrected)
+
+
+def organisation_country_code(user_id):
+    country_code = CompanyProfile.objects.filter(user_id=user_id).values_list("country_code", flat=True).first()
+    if country_code is None:
+        country_code = InstitutionProfile.objects.filter(user_id=user_id).values_list("country_code", flat=True).first()
+    return country_code or ""
+
+
+def update_location_search(offers, country_code):
+    """Recalcule `location_search` des offres d'une même organisation."""
+    offers = list(offers.only("id", "location"))
+    for offer in offers:
+        offer.location_search = build_location_search(offer.location, country_code)
+    Offer.objects.bulk_update(offers, ["location_search"], batch_size=1000)
+
+
+def filter_location(offers, location):
+    # chaque mot doit apparaître dans le lieu ou le pays (LIKE servi par l'index trigramme)
+    for term in normalize_search_text(location).split():
+        offers = offers.filter(location_search__contains=term)
+    return offers
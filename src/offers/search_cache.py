@@ -0,0 +1,73 @@
+"""Cache des résultats de recherche de la liste publique des offres.
+
+On garde, par recherche normalisée (q, location, facettes, curseur), la liste
+ordonnée des ids d'offres de la page et ce qu'il faut pour l'afficher. Les
+clés contiennent un numéro de génération incrémenté à chaque sauvegarde ou
+suppression d'une offre ou d'un profil d'organisation, une fois la
+transaction validée (offers.signals) : toutes les entrées précédentes
+deviennent inaccessibles d'un coup.
+
+N'utilise que get/set/add/incr : fonctionne avec les backends fichiers de
+Django aussi bien qu'avec Redis ou memcached. locmem ne convient qu'à un seul
+processus : la génération n'y est pas partagée entre les workers.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .search import normalize_query
+
+GENERATION_KEY = "offers:generation"
+HITS_KEY = "offers:search_cache:hits"
+MISSES_KEY = "offers:search_cache:misses"
+
+
+def current_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # valeur de départ horodatée : après une éviction on ne retombe pas sur d'anciennes clés
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def search_cache_key(query, location, facets=None, cursor=""):
+    facets = "&".join(f"{name}={value}" for name, value in sorted((facets or {}).items()))
+    raw = "|".join([normalize_query(query), normalize_query(location), facets, cursor])
+    digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return f"offers:search:{current_generation()}:{digest}"
+
+
+def get_cached_search(key):
+    result = cache.get(key)
+    _count(MISSES_KEY if result is None else HITS_KEY)
+    return result
+
+
+def cache_search(key, result):
+    cache.set(key, result, settings.OFFERS_SEARCH_CACHE_TIMEOUT)
+
+
+def search_cache_stats():
+    return {
+        "hits": cache.get(HITS_KEY, 0),
+        "misses": cache.get(MISSES_KEY, 0),
+        "generation": cache.get(GENERATION_KEY),
+    }
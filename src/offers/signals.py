@@ -0,0 +1,79 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from accounts.countries import build_location_search
+from accounts.models import CompanyProfile, InstitutionProfile, Offer, OfferDeletion
+
+from .autocomplete import index_offer
+from .cards import refresh_offer_cards, refresh_organisation_cards
+from .geo import geocode, update_coordinates
+from .search import organisation_country_code, update_location_search, update_search_vectors
+from .search_cache import bump_generation
+from .skills import release_offer_skills, sync_offer_skills
+
+
+# champs du profil recopiés dans les cartes (offers.cards.organisation_card_fields)
+ORGANISATION_CARD_FIELDS = {"organisation_name", "description", "logo", "country_code"}
+
+
+@receiver(pre_save, sender=Offer)
+def fill_offer_location(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    country_code = organisation_country_code(instance.company_id)
+    instance.location_search = build_location_search(instance.location, country_code)
+    instance.latitude, instance.longitude = geocode(instance.location, country_code)
+
+
+@receiver(post_save, sender=Offer)
+def refresh_offer_read_models(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    offers = Offer.objects.filter(pk=instance.pk)
+    update_search_vectors(offers)
+    refresh_offer_cards(offers)
+    sync_offer_skills([instance])
+    if created:
+        # une offre modifiée gonflerait les poids : elle attend la reconstruction des index
+        index_offer(instance)
+
+
+@receiver(pre_delete, sender=Offer)
+def release_offer_skill_counts(sender, instance, **kwargs):
+    release_offer_skills([instance.pk])
+
+
+@receiver(post_delete, sender=Offer)
+def record_offer_deletion(sender, instance, **kwargs):
+    # renvoyée aux clients de l'API qui synchronisent par différence
+    OfferDeletion.objects.create(offer_id=instance.pk)
+
+
+@receiver(post_save, sender=CompanyProfile)
+@receiver(post_save, sender=InstitutionProfile)
+def refresh_organisation_offers(sender, instance, raw=False, update_fields=None, **kwargs):
+    # le nom, le logo et le pays de l'organisation sont recopiés dans les cartes et l'index de ses offres
+    if raw:
+        return
+    if update_fields is None or ORGANISATION_CARD_FIELDS.intersection(update_fields):
+        refresh_organisation_cards(instance)
+    offers = Offer.objects.filter(company_id=instance.user_id)
+    if update_fields is None or "organisation_name" in update_fields:
+        update_search_vectors(offers)
+    if update_fields is None or "country_code" in update_fields:
+        update_location_search(offers, instance.country_code)
+        update_coordinates(offers, instance.country_code)
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+@receiver(post_save, sender=CompanyProfile)
+@receiver(post_delete, sender=CompanyProfile)
+@receiver(post_save, sender=InstitutionProfile)
+@receiver(post_delete, sender=InstitutionProfile)
+def invalidate_search_cache(sender, **kwargs):
+    # après le commit : une recherche concurrente relancée entre-temps ne doit pas
+    # mettre en cache, sous la nouvelle génération, des résultats d'avant la modification
+    transaction.on_commit(bump_generation)
+
@@ -0,0 +1,89 @@
+"""Table normalisée des compétences des offres.
+
+Le champ libre `Offer.skills` ("Python, Django") est découpé en lignes
+`Skill` partagées, reliées aux offres par `OfferSkill`. Le filtre
+"python ET django" devient une intersection sur l'index (skill, offer)
+au lieu d'un `icontains` sur le texte. `Skill.offer_count` est ajusté
+par différence (F()) à chaque synchronisation, sans recompter.
+
+Toutes les fonctions travaillent par lot : quelques requêtes quel que soit
+le nombre d'offres.
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, Q
+
+from accounts.models import OfferSkill, Skill
+from accounts.skills import parse_skills, skill_key
+
+
+def _apply_counts(deltas):
+    # une requête UPDATE par valeur d'écart (le plus souvent +1 / -1)
+    skills_by_delta = defaultdict(list)
+    for skill_id, delta in deltas.items():
+        if delta:
+            skills_by_delta[delta].append(skill_id)
+    for delta, skill_ids in skills_by_delta.items():
+        Skill.objects.filter(pk__in=skill_ids).update(offer_count=F("offer_count") + delta)
+
+
+def sync_offer_skills(offers):
+    """Aligne les liens OfferSkill des offres sur leur champ `skills`."""
+    wanted = {offer.pk: parse_skills(offer.skills) for offer in offers}
+    if not wanted:
+        return
+    labels = {}
+    for skills in wanted.values():
+        for key, label in skills.items():
+            labels.setdefault(key, label)
+    Skill.objects.bulk_create(
+        [Skill(name=key, label=label) for key, label in labels.items()], ignore_conflicts=True, batch_size=1000
+    )
+    skill_ids = dict(Skill.objects.filter(name__in=labels).values_list("name", "id"))
+
+    current = defaultdict(set)
+    for offer_id, skill_id in OfferSkill.objects.filter(offer_id__in=wanted).values_list("offer_id", "skill_id"):
+        current[offer_id].add(skill_id)
+
+    added, removed, deltas = [], Q(), Counter()
+    for offer_id, skills in wanted.items():
+        target = {skill_ids[key] for key in skills}
+        for skill_id in target - current[offer_id]:
+            added.append(OfferSkill(offer_id=offer_id, skill_id=skill_id))
+            deltas[skill_id] += 1
+        stale = current[offer_id] - target
+        if stale:
+            removed |= Q(offer_id=offer_id, skill_id__in=stale)
+            deltas.update({skill_id: -1 for skill_id in stale})
+
+    OfferSkill.objects.bulk_create(added, batch_size=1000)
+    if removed:
+        OfferSkill.objects.filter(removed).delete()
+    _apply_counts(deltas)
+
+
+def release_offer_skills(offer_ids):
+    """Décompte les compétences d'offres sur le point d'être supprimées."""
+    deltas = Counter()
+    for skill_id in OfferSkill.objects.filter(offer_id__in=offer_ids).values_list("skill_id", flat=True):
+        deltas[skill_id] -= 1
+    _apply_counts(deltas)
+
+
+def parse_skills_param(value):
+    """Clés des compétences demandées dans ?skills=python,django."""
+    return sorted({skill_key(label) for label in value.split(",") if skill_key(label)})
+
+
+def filter_skills(offers, keys):
+    """Offres qui demandent toutes les compétences `keys`."""
+    if not keys:
+        return offers
+    matching = (
+        OfferSkill.objects.filter(skill__name__in=keys)
+        .values("offer_id")
+        .annotate(matched=Count("skill_id"))
+        .filter(matched=len(keys))
+        .values("offer_id")
+    )
+    return offers.filter(pk__in=matching)
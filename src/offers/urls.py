@@ -1,17 +1,24 @@
 from django.urls import path
 
+from . import api
 from .views import (
     CreateOfferView,
     EditOfferView,
     OfferDetailView,
     OffersListView,
     PublicOfferDetailView,
+    autocomplete,
+    more_offers,
 )
 
 app_name = "offers"
 
 urlpatterns = [
     path("", OffersListView.as_view(), name="list"),
+    path("htmx/more/", more_offers, name="more"),
+    path("autocomplete/<str:kind>/", autocomplete, name="autocomplete"),
+    path("api/v1/offers/", api.offer_list, name="api_list"),
+    path("api/v1/offers/<uuid:pk>/", api.offer_detail, name="api_detail"),
     path("<uuid:pk>/", PublicOfferDetailView.as_view(), name="detail_public"),
     path("create/", CreateOfferView.as_view(), name="create"),
     path("<uuid:offer_id>/view/", OfferDetailView.as_view(), name="detail"),
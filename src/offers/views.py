@@ -1,13 +1,47 @@
+from contextlib import ExitStack
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
-from django.shortcuts import get_object_or_404
+from django.http import Http404
+from django.shortcuts import get_object_or_404, render
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.cache import cache_control
 from django.views.generic import FormView, TemplateView, UpdateView
 
 from accounts.models import Offer, CompanyProfile, InstitutionProfile
 from accounts.forms import OfferForm
-from accounts.countries import get_country_search_names
+from config.replicas import primary_reads, replica_reads
+
+from .autocomplete import KINDS, suggest
+from .cards import (
+    CARD_OFFER_FIELDS,
+    CARD_ORGANISATION_FIELDS,
+    cached_offer_detail,
+    offer_cards,
+    render_offer_cards,
+)
+from .facets import apply_facet_filters, cached_facets, facet_links, selected_facets
+from .geo import MAX_RADIUS_KM, filter_near
+from .pagination import KeysetPaginator, estimate_count
+from .search import (
+    filter_location,
+    fuzzy_search_offers,
+    normalize_query,
+    search_offers,
+    suggest_query,
+    trigram_threshold,
+)
+from .search_cache import cache_search, get_cached_search, search_cache_key
+from .skills import filter_skills, parse_skills_param
+
+# tri de la liste quand une recherche est saisie (sans recherche : les plus récentes)
+SORTS = {"relevance": "Pertinence", "recent": "Plus récentes"}
+
+CARD_ONLY_FIELDS = [f"card__{name}" for name in (*CARD_OFFER_FIELDS, *CARD_ORGANISATION_FIELDS)]
 
 
 class CreateOfferView(LoginRequiredMixin, FormView):
@@ -44,10 +78,9 @@ class OfferDetailView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        offer = get_object_or_404(Offer, pk=self.kwargs["offer_id"], company=self.request.user)
-        profile = getattr(self.request.user, "company_profile", None) or getattr(self.request.user, "institution_profile", None)
+        offer = get_object_or_404(Offer.objects.select_related("card"), pk=self.kwargs["offer_id"], company=self.request.user)
         context["offer"] = offer
-        context["company"] = profile
+        context["card"] = offer_cards([offer])[0]
         return context
 
 
@@ -75,73 +108,175 @@ class EditOfferView(LoginRequiredMixin, UpdateView):
         return reverse_lazy("offers:detail", kwargs={"offer_id": self.object.pk})
 
 
+def _search_offers_page(query, location, skills, near, sort, selected, cursor, batch=False):
+    """
+    Exécute la recherche de la liste publique et retourne une page sous une
+    forme qui se met en cache : ids ordonnés, curseur suivant, compte, facettes.
+    Pour un lot du défilement infini (`batch`), seulement la page : ni compte,
+    ni facettes, ni suggestion, que offer_batch.html n'affiche pas.
+    """
+    offers = Offer.objects.select_related("card").only("id", "created_at", *CARD_ONLY_FIELDS)
+    ordering = ["-created_at", "id"]
+    result = {"is_fuzzy": False, "suggestion": None, "facets": {}, "count": None}
+
+    if location:
+        offers = filter_location(offers, location)
+    offers = filter_skills(offers, skills)
+    if near:
+        offers = filter_near(offers, *near)
+
+    with ExitStack() as stack:
+        if query:
+            matched = search_offers(offers, query)
+            if not matched.exists():
+                # aucun résultat exact : recherche approchée + suggestion
+                # seuil posé par SET LOCAL : toute la page est lue dans cette transaction
+                stack.enter_context(trigram_threshold(offers.db))
+                matched = fuzzy_search_offers(offers, query)
+                result["is_fuzzy"] = True
+                if not batch:
+                    result["suggestion"] = suggest_query(matched, query)
+            offers = matched
+            if sort == "relevance":
+                ordering = ["-score", *ordering]
+
+        if not batch:
+            near_key = f"{normalize_query(near[0])}:{near[1]}" if near else ""
+            result["facets"] = cached_facets(offers, query, location, (",".join(skills), near_key))
+        offers = apply_facet_filters(offers, selected)
+
+        if not batch:
+            result["count"] = estimate_count(offers) if settings.OFFERS_APPROXIMATE_COUNT else offers.count()
+
+        paginator = KeysetPaginator(ordering, settings.OFFERS_PAGE_SIZE)
+        page_offers, result["next_cursor"] = paginator.paginate(offers, cursor)
+        result["ids"] = [offer.pk for offer in page_offers]
+        return result, offer_cards(page_offers)
+
+
+def _cards_for_ids(ids):
+    offers = Offer.objects.select_related("card").only("id", "created_at", *CARD_ONLY_FIELDS).in_bulk(ids)
+    return offer_cards([offers[pk] for pk in ids if pk in offers])
+
+
+def _near_param(params):
+    """(ville, rayon en km) de ?near=Lyon&radius=30, ou None."""
+    city = params.get("near", "").strip()
+    if not city:
+        return None
+    try:
+        radius = int(params.get("radius", ""))
+    except ValueError:
+        radius = settings.OFFERS_DEFAULT_RADIUS_KM
+    return city, min(max(radius, 1), MAX_RADIUS_KM)
+
+
+def _offers_list_context(request, batch=False):
+    query = request.GET.get("q", "").strip()
+    location = request.GET.get("location", "").strip()
+    skills = parse_skills_param(request.GET.get("skills", ""))
+    near = _near_param(request.GET)
+    sort = request.GET.get("sort", "")
+    if sort not in SORTS:
+        sort = "relevance"
+    cursor = request.GET.get("cursor", "")
+    selected = selected_facets(request.GET)
+
+    filters = {**selected, "skills": ",".join(skills), "near": ":".join(map(str, near)) if near else "", "sort": sort}
+    if batch:
+        # un lot n'a ni compte ni facettes : entrée distincte de la page complète
+        filters["batch"] = "1"
+    cache_key = search_cache_key(query, location, filters, cursor)
+    result = get_cached_search(cache_key)
+    if result is None:
+        # page et facettes mises en cache pour tous : calculées sur default, pas sur un réplica en retard
+        with primary_reads():
+            result, cards = _search_offers_page(query, location, skills, near, sort, selected, cursor, batch)
+        cache_search(cache_key, result)
+    else:
+        cards = _cards_for_ids(result["ids"])
+
+    base_params = {"q": query, "location": location}
+    if skills:
+        base_params["skills"] = ",".join(skills)
+    if near:
+        base_params["near"], base_params["radius"] = near
+    if sort != "relevance":
+        base_params["sort"] = sort
+    context = {
+        "offers": cards,
+        "offers_html": render_offer_cards(cards),
+        "count": result["count"],
+        "count_is_approximate": settings.OFFERS_APPROXIMATE_COUNT,
+        "is_fuzzy": result["is_fuzzy"],
+        "suggestion": result["suggestion"],
+        "facets": result["facets"],
+        "query": query,
+        "location": location,
+        "near": near[0] if near else "",
+        "radius": near[1] if near else settings.OFFERS_DEFAULT_RADIUS_KM,
+        "base_params": base_params,
+        "selected_facets": selected,
+        "sort": sort,
+        "sort_links": [
+            {"label": label, "active": name == sort, "query": urlencode({**base_params, **selected, "sort": name})}
+            for name, label in SORTS.items()
+        ],
+        "is_first_page": not cursor,
+        "first_page_query": urlencode({**base_params, **selected}),
+    }
+    if result["suggestion"]:
+        context["suggestion_query"] = urlencode({"q": result["suggestion"], "location": location})
+    if result["next_cursor"]:
+        context["next_page_query"] = urlencode({**base_params, **selected, "cursor": result["next_cursor"]})
+    return context
+
+
 class OffersListView(TemplateView):
     template_name = "offers/offers_list.html"
-
-    def _get_searchable_location(self, offer):
-        profile = getattr(offer.company, "company_profile", None) or getattr(offer.company, "institution_profile", None)
-        parts = []
-        if offer.location:
-            parts.append(offer.location.lower())
-        if profile and profile.country_code:
-            names = get_country_search_names(profile.country_code)
-            parts.extend(names)
-        return " ".join(parts)
+    replica_reads = True
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        query = self.request.GET.get("q", "").strip()
-        location = self.request.GET.get("location", "").strip()
+        context.update(_offers_list_context(self.request))
+        context["facets"] = facet_links(context["facets"], context["base_params"], context["selected_facets"])
+        return context
 
-        offers = Offer.objects.select_related("company").order_by("-created_at")
 
-        if query:
-            offers = offers.filter(
-                Q(title__icontains=query) |
-                Q(skills__icontains=query) |
-                Q(description__icontains=query) |
-                Q(contract_type__icontains=query) |
-                Q(company__company_profile__organisation_name__icontains=query) |
-                Q(company__institution_profile__organisation_name__icontains=query)
-            )
-
-        all_offers = list(offers)
-
-        if location:
-            terms = location.lower().split()
-            filtered_offers = []
-            for offer in all_offers:
-                searchable = self._get_searchable_location(offer)
-                if all(term in searchable for term in terms):
-                    filtered_offers.append(offer)
-            all_offers = filtered_offers
-
-        offers_with_logo = []
-        for offer in all_offers:
-            profile = getattr(offer.company, "company_profile", None) or getattr(offer.company, "institution_profile", None)
-            logo_url = profile.logo.url if profile and profile.logo else None
-            company_name = profile.organisation_name if profile else ""
-            offers_with_logo.append({
-                "offer": offer,
-                "logo_url": logo_url,
-                "company_name": company_name,
-            })
-
-        context["offers"] = offers_with_logo
-        context["count"] = len(offers_with_logo)
-        context["query"] = query
-        context["location"] = location
-        return context
+@replica_reads
+def more_offers(request):
+    # lot suivant pour le défilement infini (hx-trigger="revealed" en fin de liste)
+    return render(request, "offers/partials/offer_batch.html", _offers_list_context(request, batch=True))
+
+
+@replica_reads
+@cache_control(public=True, max_age=settings.OFFERS_AUTOCOMPLETE_MAX_AGE)
+def autocomplete(request, kind):
+    # options d'un <datalist>, ?term= est la valeur du champ qui déclenche la requête htmx (hx-vals)
+    if kind not in KINDS:
+        raise Http404
+    term = request.GET.get("term", "")
+    prefix = ""
+    if kind == "skill":
+        # on complète la dernière compétence d'une liste séparée par des virgules
+        prefix, _, term = term.rpartition(",")
+        prefix = f"{prefix}, " if prefix else ""
+    suggestions = [f"{prefix}{label}" for label in suggest(kind, term)]
+    return render(request, "offers/partials/autocomplete_options.html", {"suggestions": suggestions})
 
 
 class PublicOfferDetailView(TemplateView):
     template_name = "offers/offer_detail.html"
+    replica_reads = True
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        offer_id = self.kwargs.get("pk")
-        offer = get_object_or_404(Offer, pk=offer_id)
-        profile = getattr(offer.company, "company_profile", None) or getattr(offer.company, "institution_profile", None)
-        context["offer"] = offer
-        context["company"] = profile
-        return context
+    def get(self, request, *args, **kwargs):
+        # corps de page en cache (offers.cards.cached_offer_detail), seul le bouton "Postuler" dépend de l'utilisateur
+        detail = cached_offer_detail(self.kwargs["pk"])
+        if detail is None:
+            raise Http404
+        response = get_conditional_response(request, last_modified=detail["last_modified"])
+        if response is None:
+            response = self.render_to_response(self.get_context_data(offer_html=detail["html"], **kwargs))
+        response["Last-Modified"] = http_date(detail["last_modified"])
+        patch_vary_headers(response, ("Cookie",))
+        return response
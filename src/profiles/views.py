@@ -8,6 +8,7 @@ from django.shortcuts import get_object_or_404, redirect, render
 from django.views.generic import TemplateView
 
 from accounts.models import CompanyProfile, InstitutionProfile, Offer, StudentProfile, User
+from config.replicas import replica_reads
 
 
 class AccountSpaceView(LoginRequiredMixin, TemplateView):
@@ -198,16 +199,19 @@ class AccountDetailView(LoginRequiredMixin, TemplateView):
         return redirect("profiles:admin_validation")
 
 
+@replica_reads
 @login_required
 def tab_dashboard(request):
     return render(request, "profiles/partials/tab_dashboard.html")
 
 
+@replica_reads
 @login_required
 def tab_account(request):
     return render(request, "profiles/partials/tab_account.html")
 
 
+@replica_reads
 @login_required
 def tab_offers(request):
     if request.user.role not in (User.Role.COMPANY, User.Role.INSTITUTION):
@@ -221,6 +225,7 @@ def tab_offers(request):
     })
 
 
+@replica_reads
 @login_required
 def tab_students(request):
     if request.user.role != User.Role.INSTITUTION:
@@ -0,0 +1,10 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    # les facettes et résultats de recherche sont mis en cache entre les requêtes
+    cache.clear()
+    yield
+    cache.clear()
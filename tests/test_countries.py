@@ -0,0 +1,34 @@
+from accounts.countries import (
+    build_location_search,
+    get_country_choices,
+    get_country_search_names,
+    resolve_country_codes,
+)
+
+
+def test_search_names_include_french_names_and_aliases():
+    names = get_country_search_names("us")
+    assert names[0] == "us"
+    assert {"united states", "états-unis", "usa", "amérique"} <= set(names)
+    assert len(names) == len(set(names))
+
+
+def test_unknown_code_keeps_only_the_code():
+    assert get_country_search_names("zz") == ["zz"]
+
+
+def test_aliases_resolve_to_codes_without_accents_or_case():
+    assert resolve_country_codes("allemagne") == {"DE"}
+    assert resolve_country_codes(" Etats-Unis ") == {"US"}
+    assert resolve_country_codes("atlantide") == frozenset()
+
+
+def test_country_choices_are_sorted_and_copied():
+    choices = get_country_choices()
+    assert choices == sorted(choices, key=lambda choice: choice[1])
+    choices.clear()
+    assert get_country_choices()
+
+
+def test_location_search_is_normalised():
+    assert build_location_search("Évry", "DE").startswith("evry de germany allemagne")
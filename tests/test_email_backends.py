@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.core.cache import cache
+
+from accounts import email_backends
+from accounts.email_backends import GmailOAuth2Backend
+
+
+class TokenServer(ThreadingHTTPServer):
+    """Remplaçant local de l'endpoint token de Google : compte les appels."""
+
+    expires_in = 3600
+    delay = 0.0
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), TokenHandler)
+        self.calls = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/token"
+
+
+class TokenHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.calls += 1
+        time.sleep(self.server.delay)
+        body = json.dumps({"access_token": f"token-{self.server.calls}", "expires_in": self.server.expires_in}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def token_server(settings):
+    server = TokenServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.GMAIL_CLIENT_ID = "client"
+    settings.GMAIL_CLIENT_SECRET = "secret"
+    settings.GMAIL_REFRESH_TOKEN = "refresh"
+    settings.GMAIL_TOKEN_URL = server.url
+    settings.GMAIL_TOKEN_MARGIN = 300
+    settings.GMAIL_TOKEN_SHARED_CACHE = False
+    email_backends._tokens.clear()
+    yield server
+    email_backends._tokens.clear()
+    server.shutdown()
+    server.server_close()
+
+
+def test_token_is_reused_until_the_safety_margin(token_server, monkeypatch):
+    backend = GmailOAuth2Backend()
+    now = time.time()
+    monkeypatch.setattr(email_backends.time, "time", lambda: now)
+
+    assert backend._get_access_token() == "token-1"
+    assert backend._get_access_token() == "token-1"
+    assert token_server.calls == 1
+
+    # 3600 s de validité, renouvelé 300 s avant
+    now += 3300
+    assert backend._get_access_token() == "token-2"
+    assert token_server.calls == 2
+
+
+def test_concurrent_opens_refresh_the_token_once(token_server):
+    token_server.delay = 0.2
+    barrier = threading.Barrier(8)
+    tokens = []
+
+    def fetch():
+        barrier.wait()
+        tokens.append(GmailOAuth2Backend()._get_access_token())
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert token_server.calls == 1
+    assert tokens == ["token-1"] * 8
+
+
+def test_shared_cache_gives_one_token_to_all_workers(token_server, settings):
+    settings.GMAIL_TOKEN_SHARED_CACHE = True
+    backend = GmailOAuth2Backend()
+    assert backend._get_access_token() == "token-1"
+
+    # un autre worker : cache du processus vide, cache Django partagé
+    email_backends._tokens.clear()
+    assert backend._get_access_token() == "token-1"
+    assert token_server.calls == 1
+
+    backend._forget_access_token()
+    assert cache.get(backend._token_key()) is None
+    assert backend._get_access_token() == "token-2"
+
+
+def test_short_lived_tokens_are_not_kept(token_server):
+    token_server.expires_in = 60
+    backend = GmailOAuth2Backend()
+
+    backend._get_access_token()
+    backend._get_access_token()
+    assert token_server.calls == 2
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+
+from accounts.models import InvitationImport, StudentInvitation, User
+from invitations.imports import claim_next_import, process_rows
+
+CSV = (
+    "email,prenom,nom,filiere_ou_parcours,niveau,annee_academique\n"
+    "lea.martin@etu.example,lea,martin,BUT Informatique,BUT2,2025-2026\n"
+    "pas-un-email,hugo,petit,BUT GEA,BUT1,2025-2026\n"
+)
+
+
+@pytest.fixture
+def institution(client):
+    user = User.objects.create(username="iut@univ.fr", email="iut@univ.fr", role=User.Role.INSTITUTION)
+    client.force_login(user)
+    return user
+
+
+@pytest.mark.django_db
+def test_upload_is_queued_then_processed_by_the_worker(client, institution):
+    upload = SimpleUploadedFile("etudiants.csv", CSV.encode(), content_type="text/csv")
+    response = client.post("/invitations/upload/", {"csv_file": upload})
+    job = InvitationImport.objects.get()
+    assert response.status_code == 302
+    assert response["Location"].endswith(f"?import={job.pk}")
+    assert not StudentInvitation.objects.exists()
+    assert mail.outbox == []
+
+    page = client.get(response["Location"])
+    assert page.context["import_job"] == job
+
+    call_command("run_invitation_worker", once=True)
+    job.refresh_from_db()
+    assert job.status == InvitationImport.Status.DONE
+    assert (job.sent, job.failed) == (1, 1)
+    assert [message.to for message in mail.outbox] == [["lea.martin@etu.example"]]
+    assert StudentInvitation.objects.get().status == StudentInvitation.Status.SENT
+
+    assert client.get(response["Location"]).context["report"] == job.report
+    assert client.get(f"/invitations/imports/{job.pk}/")["HX-Refresh"] == "true"
+
+
+@pytest.mark.django_db
+def test_claimed_imports_are_not_claimed_twice(institution):
+    first = InvitationImport.objects.create(institution=institution, rows=[], base_url="http://testserver/")
+    assert claim_next_import() == first
+    assert claim_next_import() is None
+
+
+@pytest.mark.django_db
+def test_imports_left_running_by_a_dead_worker_are_claimed_again(institution, settings):
+    job = InvitationImport.objects.create(institution=institution, rows=[], base_url="http://testserver/")
+    assert claim_next_import() == job
+    InvitationImport.objects.filter(pk=job.pk).update(
+        started_at=timezone.now() - timedelta(seconds=settings.INVITATION_IMPORT_LEASE + 1)
+    )
+    assert claim_next_import() == job
+
+
+def _rows(count):
+    return [
+        {"email": f"Etudiant{index}@etu.example", "prenom": "lea", "nom": "martin", "filiere_ou_parcours": "BUT", "niveau": "BUT2", "annee_academique": "2025-2026"}
+        for index in range(count)
+    ]
+
+
+@pytest.mark.django_db
+def test_import_runs_a_constant_number_of_queries(institution, settings, django_assert_num_queries):
+    settings.EMAIL_BATCH_SIZE = 250
+    User.objects.create(username="deja", email="ETUDIANT0@etu.example")
+    process_rows(institution, _rows(3)[2:], "http://testserver/")
+    rows = _rows(500) + [{"email": "etudiant1@etu.example"}, {"email": "pas-un-email"}]
+
+    # comptes existants, invitations en cours, INSERT, un UPDATE par paquet de 250
+    with django_assert_num_queries(5):
+        report = process_rows(institution, rows, "http://testserver/")
+    assert report["sent"] == 498
+    assert report["errors"] == [
+        "Ligne 2: email déjà utilisé (etudiant0@etu.example).",
+        "Ligne 4: invitation déjà en cours pour etudiant2@etu.example.",
+        "Ligne 502: email en double dans le fichier (etudiant1@etu.example).",
+        "Ligne 503: email invalide (pas-un-email).",
+    ]
+    assert StudentInvitation.objects.filter(status=StudentInvitation.Status.SENT).count() == 499
+
+
+@pytest.mark.django_db
+def test_resumed_import_resends_only_its_unsent_invitations(institution):
+    job = InvitationImport.objects.create(institution=institution, rows=_rows(3), base_url="http://testserver/")
+    assert claim_next_import() == job
+    # état laissé par un worker arrêté : une invitation envoyée, une créée mais pas encore envoyée
+    for index, status in enumerate([StudentInvitation.Status.SENT, StudentInvitation.Status.PENDING]):
+        StudentInvitation.objects.create(
+            institution=institution,
+            email=f"etudiant{index}@etu.example",
+            token=f"token-{index}",
+            expires_at=timezone.now() + timedelta(days=7),
+            status=status,
+            import_job=job,
+        )
+    stale = timezone.now() - timedelta(seconds=1)
+    InvitationImport.objects.filter(pk=job.pk).update(started_at=stale)
+
+    report = process_rows(institution, job.rows, job.base_url, job)
+
+    assert report == {"sent": 3, "failed": 0, "errors": []}
+    assert sorted(message.to[0] for message in mail.outbox) == ["etudiant1@etu.example", "etudiant2@etu.example"]
+    assert set(job.invitations.values_list("status", flat=True)) == {StudentInvitation.Status.SENT}
+    assert InvitationImport.objects.get(pk=job.pk).started_at > stale
@@ -0,0 +1,76 @@
+import smtplib
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+
+from accounts.mail import send_mass_messages
+
+
+class FlakyBackend(EmailBackend):
+    """Backend locmem qui compte les ouvertures, perd la connexion sur `broken` et refuse `refused`."""
+
+    def __init__(self, broken=(), refused=(), **kwargs):
+        super().__init__(**kwargs)
+        self.broken = set(broken)
+        self.refused = set(refused)
+        self.opened = 0
+        self.is_open = False
+
+    def open(self):
+        if not self.is_open:
+            self.opened += 1
+            self.is_open = True
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.broken & set(message.to):
+                raise smtplib.SMTPServerDisconnected("connexion perdue")
+            if self.refused & set(message.to):
+                raise smtplib.SMTPRecipientsRefused({address: (550, b"mailbox unavailable") for address in message.to})
+        return super().send_messages(messages)
+
+
+def _messages(count):
+    return [EmailMessage("Sujet", "Corps", "no-reply@mosifra.local", [f"etudiant{index}@etu.example"]) for index in range(count)]
+
+
+def test_batch_is_sent_over_a_single_connection(settings):
+    settings.EMAIL_BATCH_SIZE = 100
+    backend = FlakyBackend()
+
+    assert send_mass_messages(_messages(250), connection=backend) == []
+    assert backend.opened == 1
+    assert not backend.is_open
+
+
+def test_reconnects_after_a_failure_then_gives_up_on_the_batch(settings):
+    settings.EMAIL_BATCH_SIZE = 4
+    settings.EMAIL_BATCH_MAX_RECONNECTS = 2
+    messages = _messages(6)
+    backend = FlakyBackend(broken={"etudiant1@etu.example"})
+
+    failed = send_mass_messages(messages, connection=backend)
+
+    assert failed[0] == (messages[1], "SMTPServerDisconnected: connexion perdue")
+    # le reste du paquet n'est pas tenté, le paquet suivant repart avec une connexion neuve
+    assert [message for message, _ in failed] == messages[1:4]
+    assert len(mail.outbox) == 3
+    # ouverture initiale et deux reconnexions pour le premier paquet, une ouverture pour le second
+    assert backend.opened == 4
+
+
+def test_refused_recipient_fails_alone_without_reconnecting(settings):
+    settings.EMAIL_BATCH_MAX_RECONNECTS = 2
+    messages = _messages(3)
+    backend = FlakyBackend(refused={"etudiant1@etu.example"})
+
+    failed = send_mass_messages(messages, connection=backend)
+
+    assert [message for message, _ in failed] == [messages[1]]
+    assert failed[0][1].startswith("SMTPRecipientsRefused")
+    assert backend.opened == 1
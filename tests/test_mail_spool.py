@@ -0,0 +1,111 @@
+import socket
+from datetime import timedelta
+
+import pytest
+from django.core.mail import send_mail
+from django.utils import timezone
+
+from accounts.models import OutboundEmail, StudentInvitation, User
+from accounts.spool import claim_batch, dispatch_pending
+from invitations.imports import process_rows
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class Inbox:
+    """Serveur SMTP local : refuse les destinataires `rejete*`, garde les autres messages."""
+
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("rejete"):
+            return "550 mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return "250 Message accepted for delivery"
+
+
+@pytest.fixture
+def smtp_server(settings):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    inbox = Inbox()
+    controller = aiosmtpd_controller.Controller(inbox, hostname="127.0.0.1", port=port)
+    controller.start()
+    settings.EMAIL_BACKEND = "accounts.email_backends.SpoolBackend"
+    settings.EMAIL_SPOOL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+    settings.EMAIL_HOST = "127.0.0.1"
+    settings.EMAIL_PORT = port
+    settings.EMAIL_HOST_USER = ""
+    settings.EMAIL_HOST_PASSWORD = ""
+    settings.EMAIL_USE_TLS = False
+    settings.EMAIL_USE_SSL = False
+    settings.EMAIL_SPOOL_MAX_ATTEMPTS = 2
+    settings.EMAIL_SPOOL_BACKOFF = 30
+    yield inbox
+    controller.stop()
+
+
+def _recipients(inbox):
+    return sorted(address for envelope in inbox.envelopes for address in envelope.rcpt_tos)
+
+
+@pytest.mark.django_db
+def test_spooled_mails_are_retried_then_dead_lettered(smtp_server):
+    for address in ("lea@etu.example", "rejete@etu.example", "hugo@etu.example"):
+        send_mail("Code", "123456", None, [address])
+    assert smtp_server.envelopes == []
+    assert OutboundEmail.objects.filter(status=OutboundEmail.Status.QUEUED).count() == 3
+
+    assert dispatch_pending() == (2, 1, 0)
+    assert _recipients(smtp_server) == ["hugo@etu.example", "lea@etu.example"]
+    rejected = OutboundEmail.objects.get(status=OutboundEmail.Status.QUEUED)
+    assert rejected.attempts == 1
+    assert "550" in rejected.last_error
+    # pas avant l'attente exponentielle
+    assert rejected.next_attempt_at > timezone.now() + timedelta(seconds=25)
+    assert dispatch_pending() == (0, 0, 0)
+
+    OutboundEmail.objects.filter(pk=rejected.pk).update(next_attempt_at=timezone.now())
+    assert dispatch_pending() == (0, 0, 1)
+    assert OutboundEmail.objects.get(pk=rejected.pk).status == OutboundEmail.Status.DEAD
+
+
+@pytest.mark.django_db
+def test_invitation_status_follows_real_delivery(smtp_server):
+    institution = User.objects.create(username="iut@univ.fr", email="iut@univ.fr", role=User.Role.INSTITUTION)
+    report = process_rows(institution, [{"email": "lea@etu.example"}, {"email": "rejete@etu.example"}], "http://testserver/")
+    assert report["sent"] == 2
+    assert set(StudentInvitation.objects.values_list("status", flat=True)) == {StudentInvitation.Status.PENDING}
+
+    dispatch_pending()
+    OutboundEmail.objects.filter(status=OutboundEmail.Status.QUEUED).update(next_attempt_at=timezone.now())
+    dispatch_pending()
+
+    statuses = dict(StudentInvitation.objects.values_list("email", "status"))
+    assert statuses == {
+        "lea@etu.example": StudentInvitation.Status.SENT,
+        "rejete@etu.example": StudentInvitation.Status.FAILED,
+    }
+
+
+@pytest.mark.django_db
+def test_claimed_batch_is_leased_for_the_time_it_may_take_to_send(settings):
+    settings.EMAIL_BACKEND = "accounts.email_backends.SpoolBackend"
+    settings.EMAIL_TIMEOUT = 30
+    settings.EMAIL_BATCH_MAX_RECONNECTS = 3
+    settings.EMAIL_SPOOL_LEASE = 60
+    for index in range(3):
+        send_mail("Code", "123456", None, [f"etudiant{index}@etu.example"])
+
+    before = timezone.now()
+    batch = claim_batch(20)
+    # (20 emails + 3 reconnexions) * 30 s + 60 s de marge
+    assert {email.next_attempt_at for email in batch} == {batch[0].next_attempt_at}
+    assert batch[0].next_attempt_at >= before + timedelta(seconds=750)
+    assert claim_batch(20) == []
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from accounts.models import CompanyProfile, Offer, User
+from accounts.countries import normalize_search_text
+from offers import autocomplete
+from offers.autocomplete import PrefixIndex, suggest
+from offers.search_cache import bump_generation
+
+
+def test_prefix_index_matches_accents_and_orders_by_weight():
+    index = PrefixIndex({"Python": 3, "PyTorch": 5, "Java": 9, "Pâtisserie": 1})
+    assert index.suggest("py") == ["PyTorch", "Python"]
+    assert index.suggest("pat") == ["Pâtisserie"]
+    index.add("Pyramid", 10)
+    assert index.suggest("PY")[0] == "Pyramid"
+    assert index.suggest("") == []
+
+
+def test_prefix_index_suggestions_stay_consistent_during_adds():
+    index = PrefixIndex({"Python": 3})
+    writer = threading.Thread(target=lambda: [index.add(f"Py{number}") for number in range(2000)])
+    writer.start()
+    while writer.is_alive():
+        # libellé et clé lus dans le même instantané
+        assert all(normalize_search_text(label).startswith("py") for label in index.suggest("py"))
+    writer.join()
+    assert index.suggest("py1999") == ["Py1999"]
+
+
+def test_stale_indexes_are_served_while_rebuilding_in_the_background(monkeypatch, settings):
+    settings.OFFERS_AUTOCOMPLETE_REBUILD_INTERVAL = 0
+    release = threading.Event()
+
+    def slow_build():
+        release.wait(5)
+        return {kind: PrefixIndex({"Rust": 1}) for kind in ("skill", "city", "organisation")}
+
+    old = {kind: PrefixIndex() for kind in ("skill", "city", "organisation")}
+    monkeypatch.setattr(autocomplete, "_state", {"indexes": old, "generation": None, "built_at": 0.0, "rebuilding": False})
+    monkeypatch.setattr(autocomplete, "_build_indexes", slow_build)
+    bump_generation()
+
+    assert suggest("skill", "ru") == []
+    assert autocomplete._state["rebuilding"]
+    release.set()
+    deadline = time.monotonic() + 5
+    while autocomplete._state["rebuilding"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert suggest("skill", "ru") == ["Rust"]
+
+
+@pytest.mark.django_db
+def test_autocomplete_endpoint_is_cacheable(client, settings):
+    settings.OFFERS_AUTOCOMPLETE_REBUILD_INTERVAL = 0
+    user = User.objects.create(username="rh@acme.fr", email="rh@acme.fr", role=User.Role.COMPANY)
+    CompanyProfile.objects.create(user=user, organisation_name="Pylon Conseil", country_code="FR")
+    Offer.objects.create(company=user, title="Stage", location="Lyon", skills="Python, Django", description="Stage")
+
+    response = client.get("/offres/autocomplete/skill/", {"term": "SQL, dja"})
+    assert "public" in response["Cache-Control"]
+    assert response.content.decode().count("<option") == 1
+    assert 'value="SQL, Django"' in response.content.decode()
+
+    Offer.objects.create(company=user, title="Stage", location="Lille", description="Stage")
+    content = client.get("/offres/autocomplete/city/", {"term": "li"}).content.decode()
+    assert 'value="Lille"' in content and "Lyon" not in content
+    content = client.get("/offres/autocomplete/search/", {"term": "py"}).content.decode()
+    assert 'value="Python"' in content and 'value="Pylon Conseil"' in content
+    assert client.get("/offres/autocomplete/unknown/").status_code == 404
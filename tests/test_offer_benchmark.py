@@ -0,0 +1,45 @@
+import json
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+
+from accounts.models import Offer, OfferCard
+from offers.benchmark import percentile
+from offers.corpus import CorpusGenerator, seed_corpus
+
+
+def test_corpus_is_deterministic():
+    first, second = CorpusGenerator(seed=7), CorpusGenerator(seed=7)
+    organisation = first.organisation(0)
+    assert organisation == second.organisation(0)
+    assert [first.offer(organisation) for _ in range(5)] == [second.offer(organisation) for _ in range(5)]
+    assert first.offer_owners(50, 5) == second.offer_owners(50, 5)
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+    assert (percentile(values, 0.5), percentile(values, 0.95), percentile(values, 0.99)) == (50, 95, 99)
+    assert percentile([], 0.5) is None
+
+
+@pytest.mark.django_db
+def test_seeded_offers_have_their_read_models():
+    seed_corpus(30, organisations_count=3)
+    assert Offer.objects.count() == 30
+    assert OfferCard.objects.count() == 30
+    assert not Offer.objects.filter(search_vector__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_bench_command_writes_json_and_leaves_the_database_untouched(tmp_path):
+    cache.set("mail-delivery:abc", "sent")
+    output = tmp_path / "bench.json"
+    call_command("bench_offers", sizes="20", repeat=2, output=str(output))
+    results = json.loads(output.read_text())
+    scenarios = results["runs"]["20"]
+    assert {"list", "list_q", "detail", "tab_offers"} <= set(scenarios)
+    assert all(metrics["status"] == 200 for metrics in scenarios.values())
+    assert not Offer.objects.exists()
+    # cache privé : le cache partagé n'est pas vidé
+    assert cache.get("mail-delivery:abc") == "sent"
@@ -0,0 +1,104 @@
+import uuid
+
+import pytest
+from django.core.cache import cache
+
+from accounts.models import CompanyProfile, Offer, OfferCard, User
+from offers.cards import card_fragment_key, render_offer_cards
+
+
+@pytest.fixture
+def company():
+    user = User.objects.create(username="rh@acme.fr", email="rh@acme.fr", role=User.Role.COMPANY)
+    CompanyProfile.objects.create(user=user, organisation_name="Acme", country_code="FR", description="Conseil")
+    return user
+
+
+@pytest.mark.django_db
+def test_cards_follow_offer_and_organisation_changes(company):
+    offer = Offer.objects.create(company=company, title="Stage data", location="Lyon", description="Stage")
+    assert OfferCard.objects.get(pk=offer.pk).organisation_name == "Acme"
+
+    offer.title = "Stage data science"
+    offer.save()
+    profile = company.company_profile
+    profile.organisation_name = "Acme Group"
+    profile.save()
+
+    card = OfferCard.objects.get(pk=offer.pk)
+    assert (card.title, card.organisation_name, card.country_code) == ("Stage data science", "Acme Group", "FR")
+
+
+@pytest.mark.django_db
+def test_list_and_detail_render_from_cards(client, company, django_assert_num_queries):
+    offers = [
+        Offer.objects.create(company=company, title=f"Offre {index}", location="Lyon", description="Stage")
+        for index in range(5)
+    ]
+    # facettes, COUNT et page
+    with django_assert_num_queries(3):
+        response = client.get("/offres/")
+    assert [card.title for card in response.context["offers"]] == [offer.title for offer in reversed(offers)]
+
+    # version de l'offre, puis offre + carte
+    with django_assert_num_queries(2):
+        response = client.get(f"/offres/{offers[0].pk}/")
+    assert "Acme" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_missing_cards_are_rebuilt_on_read(client, company):
+    offer = Offer.objects.create(company=company, title="Offre", location="Lyon", description="Stage")
+    OfferCard.objects.all().delete()
+    response = client.get("/offres/")
+    assert [card.offer_id for card in response.context["offers"]] == [offer.pk]
+    assert OfferCard.objects.filter(pk=offer.pk).exists()
+
+
+@pytest.mark.django_db
+def test_card_fragments_are_cached_until_offer_or_organisation_changes(company):
+    offer = Offer.objects.create(company=company, title="Stage data", location="Lyon", description="Stage")
+    card = OfferCard.objects.get(pk=offer.pk)
+    assert "Stage data" in render_offer_cards([card])
+
+    stale = card_fragment_key(card)
+    cache.set(stale, "<a>fragment en cache</a>")
+    assert render_offer_cards([card]) == "<a>fragment en cache</a>"
+
+    profile = company.company_profile
+    profile.organisation_name = "Acme Group"
+    profile.save()
+    card = OfferCard.objects.get(pk=offer.pk)
+    assert card_fragment_key(card) != stale
+    assert "Acme Group" in render_offer_cards([card])
+
+
+@pytest.mark.django_db
+def test_detail_page_is_cached_until_offer_or_organisation_changes(client, company, django_assert_num_queries):
+    offer = Offer.objects.create(company=company, title="Stage data", location="Lyon", description="Stage")
+    url = f"/offres/{offer.pk}/"
+    response = client.get(url)
+    # une requête de version par page, sans rendu
+    with django_assert_num_queries(2):
+        assert client.get(url).content == response.content
+        assert client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code == 304
+
+    offer.title = "Stage data science"
+    offer.save()
+    assert "Stage data science" in client.get(url).content.decode()
+
+    profile = company.company_profile
+    profile.organisation_name = "Acme Group"
+    profile.save()
+    assert "Acme Group" in client.get(url).content.decode()
+    assert client.get(f"/offres/{uuid.uuid4()}/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_profile_saves_that_touch_no_card_field_leave_cards_alone(company, django_assert_num_queries):
+    Offer.objects.create(company=company, title="Stage data", location="Lyon", description="Stage")
+    profile = company.company_profile
+    profile.phone = "0102030405"
+    # l'UPDATE du profil seulement
+    with django_assert_num_queries(1):
+        profile.save(update_fields=["phone"])
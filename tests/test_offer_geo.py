@@ -0,0 +1,61 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+from accounts.models import City, CompanyProfile, Offer, User
+from offers.geo import bounding_box, geocode, haversine_km
+
+# extrait au format GeoNames : id, nom, nom ascii, alias, lat, lng, ..., pays (8), ..., population (14)
+GAZETTEER = [
+    (2996944, "Lyon", 45.74846, 4.84671, "FR", 472317),
+    (2988507, "Paris", 48.85341, 2.3488, "FR", 2138551),
+    (3031582, "Bourg-en-Bresse", 46.20574, 5.2258, "FR", 41248),
+    (6618607, "Villeurbanne", 45.76601, 4.8795, "FR", 150659),
+    (4717560, "Paris", 33.66094, -95.55551, "US", 24782),
+]
+
+
+@pytest.fixture
+def gazetteer(tmp_path):
+    path = tmp_path / "cities500.txt"
+    lines = []
+    for geoname_id, name, latitude, longitude, country, population in GAZETTEER:
+        columns = [str(geoname_id), name, name, "", str(latitude), str(longitude), "P", "PPL", country, "", "", "", "", "", str(population)]
+        lines.append("\t".join(columns + ["", "", "Europe/Paris", "2024-01-01"]))
+    path.write_text("\n".join(lines), encoding="utf-8")
+    return path
+
+
+def test_bounding_box_contains_the_circle():
+    lat_min, lat_max, lng_min, lng_max = bounding_box(45.75, 4.85, 50)
+    assert haversine_km(45.75, 4.85, lat_max, 4.85) == pytest.approx(50, rel=1e-6)
+    assert haversine_km(45.75, 4.85, 45.75, lng_max) >= 50
+    assert bounding_box(89.9, 0, 50)[2:] == (-180.0, 180.0)
+    assert haversine_km(45.74846, 4.84671, 48.85341, 2.3488) == pytest.approx(392, abs=2)
+
+
+@pytest.mark.django_db
+def test_offers_are_geocoded_and_filtered_by_radius(client, gazetteer):
+    user = User.objects.create(username="rh@acme.fr", email="rh@acme.fr", role=User.Role.COMPANY)
+    CompanyProfile.objects.create(user=user, organisation_name="Acme", country_code="FR")
+    paris = Offer.objects.create(company=user, title="Stage Paris", location="Paris", description="Stage")
+    call_command("load_gazetteer", str(gazetteer), stdout=io.StringIO())
+    assert City.objects.count() == len(GAZETTEER)
+
+    paris.refresh_from_db()
+    assert (paris.latitude, paris.longitude) == (48.85341, 2.3488)  # Paris (FR) et non Paris (Texas)
+    # pays écrit dans le lieu : prioritaire sur celui de l'organisation
+    assert geocode("Paris (USA)", "FR") == (33.66094, -95.55551)
+    assert geocode("Paris, France", "US") == (48.85341, 2.3488)
+    # un morceau de nom composé n'est pas un pays ("de" -> DE)
+    assert geocode("Paris-de-Lamar", "US") == (33.66094, -95.55551)
+    villeurbanne = Offer.objects.create(company=user, title="Stage", location="Villeurbanne (69)", description="Stage")
+    bourg = Offer.objects.create(company=user, title="Stage", location="Bourg-en-Bresse", description="Stage")
+    Offer.objects.create(company=user, title="Stage", location="Télétravail", description="Stage")
+
+    response = client.get("/offres/", {"near": "lyon", "radius": "20"})
+    assert [card.offer_id for card in response.context["offers"]] == [villeurbanne.pk]
+    response = client.get("/offres/", {"near": "Lyon", "radius": "100"})
+    assert {card.offer_id for card in response.context["offers"]} == {villeurbanne.pk, bourg.pk}
+    assert client.get("/offres/", {"near": "Atlantide"}).context["offers"] == []
@@ -0,0 +1,73 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Offer, User
+from offers.pagination import KeysetPaginator, estimate_count
+from offers.search import search_offers
+
+
+@pytest.fixture
+def offers():
+    user = User.objects.create(username="rh@acme.fr", email="rh@acme.fr", role=User.Role.COMPANY)
+    return [
+        Offer.objects.create(company=user, title=f"Stage python {index}", location="Lyon", description="python " * index)
+        for index in range(1, 8)
+    ]
+
+
+def _walk(paginator, queryset):
+    pages, cursor = [], None
+    while True:
+        items, cursor = paginator.paginate(queryset, cursor)
+        pages.append(items)
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.django_db
+def test_keyset_pages_cover_every_offer_once(offers):
+    Offer.objects.update(created_at=offers[0].created_at)  # égalités départagées par l'id
+    paginator = KeysetPaginator(["-created_at", "id"], page_size=3)
+    pages = _walk(paginator, Offer.objects.all())
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [offer.pk for page in pages for offer in page] == list(
+        Offer.objects.order_by("-created_at", "id").values_list("pk", flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_keyset_pages_follow_search_rank(offers):
+    paginator = KeysetPaginator(["-rank", "-created_at", "id"], page_size=2)
+    queryset = search_offers(Offer.objects.all(), "python")
+    walked = [offer.pk for page in _walk(paginator, queryset) for offer in page]
+    assert walked == [offer.pk for offer in queryset.order_by("-rank", "-created_at", "id")]
+
+
+@pytest.mark.django_db
+def test_tampered_cursor_restarts_from_first_page(offers):
+    paginator = KeysetPaginator(["-created_at", "id"], page_size=3)
+    first_page, _ = paginator.paginate(Offer.objects.all())
+    assert paginator.paginate(Offer.objects.all(), "not-a-cursor")[0] == first_page
+    assert estimate_count(Offer.objects.all()) >= 0
+
+
+@pytest.mark.django_db
+def test_infinite_scroll_batches_chain_until_the_last_offer(client, settings, offers):
+    settings.OFFERS_PAGE_SIZE = 3
+    response = client.get("/offres/", {"q": "python"})
+    assert len(response.context["offers"]) == 3
+    assert 'hx-trigger="revealed"' in response.content.decode()
+
+    seen = [card.offer_id for card in response.context["offers"]]
+    query = response.context["next_page_query"]
+    while query:
+        with CaptureQueriesContext(connection) as queries:
+            batch = client.get(f"/offres/htmx/more/?{query}")
+        # offer_batch.html n'affiche ni compte ni facettes
+        assert not [q for q in queries if "COUNT(" in q["sql"].upper()]
+        assert b"<html" not in batch.content
+        seen += [card.offer_id for card in batch.context["offers"]]
+        query = batch.context.get("next_page_query")
+    assert sorted(seen) == sorted(offer.pk for offer in offers)
+    assert 'hx-trigger="revealed"' not in batch.content.decode()
@@ -0,0 +1,125 @@
+import pytest
+
+from accounts.models import CompanyProfile, Offer, Skill, User
+from offers.facets import apply_facet_filters, compute_facets, facet_label
+from offers.search import filter_location, fuzzy_search_offers, search_offers, suggest_query, trigram_threshold
+
+
+@pytest.fixture
+def company():
+    user = User.objects.create(username="rh@acme.fr", email="rh@acme.fr", role=User.Role.COMPANY)
+    CompanyProfile.objects.create(user=user, organisation_name="Capgémini", country_code="FR")
+    return user
+
+
+def _search(text):
+    return list(search_offers(Offer.objects.all(), text).order_by("-rank"))
+
+
+@pytest.mark.django_db
+def test_search_ignores_accents_and_matches_prefixes(company):
+    offer = Offer.objects.create(
+        company=company, title="Développeur web", skills="python, django", location="Lyon", description="Stage"
+    )
+    assert _search("developpeur") == [offer]
+    assert _search("dév pyth") == [offer]
+    assert _search("java") == []
+
+
+@pytest.mark.django_db
+def test_search_follows_organisation_renames(company):
+    offer = Offer.objects.create(company=company, title="Data analyst", location="Paris", description="Stage")
+    assert _search("capgemini") == [offer]
+
+    profile = company.company_profile
+    profile.organisation_name = "Sopra Steria"
+    profile.save()
+    assert _search("capgemini") == []
+    assert _search("sopra") == [offer]
+
+
+@pytest.mark.django_db
+def test_location_filter_matches_city_and_country_aliases(company):
+    offer = Offer.objects.create(company=company, title="Stage RH", location="Évry", description="Stage")
+    assert list(filter_location(Offer.objects.all(), "evry")) == [offer]
+    assert list(filter_location(Offer.objects.all(), "france")) == [offer]
+
+    profile = company.company_profile
+    profile.country_code = "DE"
+    profile.save(update_fields=["country_code"])
+    assert list(filter_location(Offer.objects.all(), "france")) == []
+    assert list(filter_location(Offer.objects.all(), "allemagne")) == [offer]
+
+
+@pytest.mark.django_db
+def test_misspelled_search_falls_back_to_trigrams(client, company):
+    offer = Offer.objects.create(
+        company=company, title="Développeur backend", skills="python, django", location="Lyon", description="Stage"
+    )
+    assert _search("pyhton") == []
+    with trigram_threshold():
+        fuzzy = fuzzy_search_offers(Offer.objects.all(), "pyhton")
+        assert list(fuzzy) == [offer]
+        assert suggest_query(fuzzy, "pyhton") == "python"
+        # nom d'organisation : branche accounts_offercard de l'UNION
+        assert list(fuzzy_search_offers(Offer.objects.all(), company.company_profile.organisation_name[:-1])) == [offer]
+
+    response = client.get("/offres/", {"q": "pyhton"})
+    assert response.context["is_fuzzy"]
+    assert response.context["suggestion"] == "python"
+    assert [card.offer_id for card in response.context["offers"]] == [offer.pk]
+
+
+@pytest.mark.django_db
+def test_facets_count_the_filtered_offers_in_one_query(company, django_assert_num_queries):
+    Offer.objects.create(company=company, title="Stage web", location="Lyon", description="Stage", remote=True)
+    Offer.objects.create(company=company, title="Stage data", location="Lyon", description="Stage")
+    Offer.objects.create(
+        company=company, title="Alternance web", location="Paris", description="Alternance", contract_type="alternance"
+    )
+    with django_assert_num_queries(1):
+        facets = compute_facets(search_offers(Offer.objects.all(), "stage"))
+    assert facets == {
+        "contract_type": [("stage", 2)],
+        "remote": [(False, 1), (True, 1)],
+        "country": [("FR", 2)],
+        "city": [("Lyon", 2)],
+    }
+    assert list(apply_facet_filters(Offer.objects.all(), {"city": "Paris", "remote": "0"})) == [
+        Offer.objects.get(location="Paris")
+    ]
+
+
+@pytest.mark.django_db
+def test_skills_are_normalised_counted_and_intersected(client):
+    user = User.objects.create(username="rh@skills.fr", email="rh@skills.fr", role=User.Role.COMPANY)
+    both = Offer.objects.create(company=user, title="Stage web", location="Lyon", skills="Python, Django", description="Stage")
+    python_only = Offer.objects.create(company=user, title="Stage data", location="Lyon", skills="python ,  Pandas", description="Stage")
+
+    assert dict(Skill.objects.values_list("name", "offer_count")) == {"python": 2, "django": 1, "pandas": 1}
+    response = client.get("/offres/", {"skills": "PYTHON,django"})
+    assert [card.offer_id for card in response.context["offers"]] == [both.pk]
+
+    python_only.skills = "Pandas, Django"
+    python_only.save()
+    both.delete()
+    assert dict(Skill.objects.values_list("name", "offer_count")) == {"python": 0, "django": 1, "pandas": 1}
+    response = client.get("/offres/", {"skills": "django, pandas"})
+    assert [card.offer_id for card in response.context["offers"]] == [python_only.pk]
+
+
+@pytest.mark.django_db
+def test_title_matches_rank_above_description_matches_unless_sorted_by_date(client, company):
+    in_title = Offer.objects.create(company=company, title="Stage Kotlin", location="Lyon", description="Stage mobile")
+    in_skills = Offer.objects.create(company=company, title="Stage mobile", location="Lyon", skills="Kotlin", description="Stage")
+    in_description = Offer.objects.create(company=company, title="Stage", location="Lyon", description="Un peu de kotlin")
+
+    response = client.get("/offres/", {"q": "kotlin"})
+    assert [card.offer_id for card in response.context["offers"]] == [in_title.pk, in_skills.pk, in_description.pk]
+    response = client.get("/offres/", {"q": "kotlin", "sort": "recent"})
+    assert [card.offer_id for card in response.context["offers"]] == [in_description.pk, in_skills.pk, in_title.pk]
+
+
+def test_unknown_contract_type_is_labelled_with_its_raw_value():
+    assert facet_label("contract_type", "stage") == "Stage"
+    assert facet_label("contract_type", "cdd") == "cdd"
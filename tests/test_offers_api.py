@@ -0,0 +1,83 @@
+import pytest
+
+from accounts.models import CompanyProfile, Offer, User
+
+
+@pytest.fixture
+def offers():
+    user = User.objects.create(username="rh@acme.fr", email="rh@acme.fr", role=User.Role.COMPANY)
+    CompanyProfile.objects.create(user=user, organisation_name="Acme", country_code="FR")
+    return [
+        Offer.objects.create(company=user, title=f"Stage python {index}", location="Lyon", description="Stage")
+        for index in range(5)
+    ]
+
+
+@pytest.mark.django_db
+def test_catalogue_pages_and_field_selection(client, settings, offers):
+    settings.OFFERS_API_PAGE_SIZE = 2
+    seen, url = [], "/offres/api/v1/offers/?fields=title,organisation_name"
+    while url:
+        data = client.get(url).json()
+        assert all(set(item) == {"id", "title", "organisation_name"} for item in data["results"])
+        seen += [item["id"] for item in data["results"]]
+        url = data["next"]
+    assert seen == [str(offer.pk) for offer in reversed(offers)]
+
+    assert client.get("/offres/api/v1/offers/?fields=phone").status_code == 400
+
+
+@pytest.mark.django_db
+def test_unchanged_poll_returns_304(client, offers):
+    response = client.get("/offres/api/v1/offers/")
+    etag = response["ETag"]
+    assert client.get("/offres/api/v1/offers/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    offers[0].title = "Stage java"
+    offers[0].save()
+    response = client.get("/offres/api/v1/offers/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+    detail = client.get(f"/offres/api/v1/offers/{offers[0].pk}/")
+    assert detail.json()["title"] == "Stage java"
+    assert client.get(
+        f"/offres/api/v1/offers/{offers[0].pk}/", HTTP_IF_MODIFIED_SINCE=detail["Last-Modified"]
+    ).status_code == 304
+
+
+@pytest.mark.django_db
+def test_updated_since_returns_changed_offers_only(client, offers):
+    since = offers[-1].updated_at.isoformat()
+    offers[1].description = "Stage data"
+    offers[1].save()
+    data = client.get("/offres/api/v1/offers/", {"updated_since": since, "fields": "id"}).json()
+    assert [item["id"] for item in data["results"]] == [str(offers[1].pk)]
+
+    assert client.get("/offres/api/v1/offers/", {"updated_since": "hier"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_delta_sync_reports_deletions_and_a_server_watermark(client, settings, offers):
+    settings.OFFERS_API_PAGE_SIZE = 2
+    first = client.get("/offres/api/v1/offers/").json()
+    watermark = first["watermark"]
+    assert "deleted" not in first
+    # les pages suivantes gardent le watermark de la première
+    assert client.get(first["next"]).json()["watermark"] == watermark
+
+    deleted_pk = offers[0].pk
+    offers[0].delete()
+    offers[1].title = "Stage java"
+    offers[1].save()
+
+    data = client.get("/offres/api/v1/offers/", {"updated_since": watermark, "fields": "id"}).json()
+    # recul de OFFERS_API_SYNC_MARGIN : les offres du fixture reviennent aussi, sans doublon à la fusion
+    assert str(offers[1].pk) in [item["id"] for item in data["results"]]
+    assert data["deleted"] == [str(deleted_pk)]
+    assert data["watermark"] > watermark
+
+    settings.OFFERS_API_SYNC_MARGIN = 0
+    watermark = client.get("/offres/api/v1/offers/").json()["watermark"]
+    data = client.get("/offres/api/v1/offers/", {"updated_since": watermark}).json()
+    assert (data["results"], data["deleted"]) == ([], [])
@@ -0,0 +1,49 @@
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from accounts.models import Offer
+from config.replicas import PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware, primary_reads, replica_reads
+from offers.views import OffersListView
+
+REPLICA = {"ENGINE": "django.db.backends.postgresql", "NAME": "mosifra", "TEST": {"MIRROR": "default"}}
+
+
+def _route(settings, method="GET", view=OffersListView.as_view(), cookies=None, model=Offer):
+    settings.DATABASES = {**settings.DATABASES, "replica_1": REPLICA}
+    request = getattr(RequestFactory(), method.lower())("/offres/")
+    request.COOKIES.update(cookies or {})
+    seen = {}
+
+    def get_response(request):
+        middleware.process_view(request, view, (), {})
+        seen["db"] = ReplicaRouter().db_for_read(model)
+        with primary_reads():
+            seen["cached_db"] = ReplicaRouter().db_for_read(model)
+        return HttpResponse()
+
+    middleware = ReplicaRoutingMiddleware(get_response)
+    response = middleware(request)
+    return seen["db"], response, seen["cached_db"]
+
+
+def test_marked_views_read_on_a_replica(settings):
+    assert _route(settings)[0] == "replica_1"
+    assert _route(settings, view=replica_reads(lambda request: None))[0] == "replica_1"
+    assert _route(settings, view=lambda request: None)[0] is None
+    assert _route(settings, model=Session)[0] is None
+    # hors requête : default
+    assert ReplicaRouter().db_for_read(Offer) is None
+    assert ReplicaRouter().db_for_write(Offer) == "default"
+
+
+def test_reads_filling_shared_caches_stay_on_the_primary(settings):
+    # un réplica en retard remettrait en cache, pour tous, ce qu'une écriture vient d'invalider
+    assert _route(settings)[2] is None
+
+
+def test_writes_pin_the_browser_on_the_primary(settings):
+    db, response, _ = _route(settings, method="POST")
+    assert db is None
+    assert response.cookies[PIN_COOKIE]["max-age"] == settings.DATABASE_REPLICA_PIN_SECONDS
+    assert _route(settings, cookies={PIN_COOKIE: "1"})[0] is None
@@ -0,0 +1,49 @@
+import pytest
+
+from accounts.models import Offer, User
+from offers.search_cache import bump_generation, search_cache_key, search_cache_stats
+
+
+@pytest.fixture(params=["locmem", "filebased"])
+def cache_backend(request, settings, tmp_path):
+    backends = {
+        "locmem": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "search-cache-tests"},
+        "filebased": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(tmp_path)},
+    }
+    settings.CACHES = {"default": backends[request.param]}
+    return request.param
+
+
+def test_keys_are_normalised_and_change_with_generation(cache_backend):
+    key = search_cache_key("Développeur  Web", "Lyon", {"remote": "1"})
+    assert key == search_cache_key("developpeur web!", "lyon", {"remote": "1"})
+    assert key != search_cache_key("developpeur web", "lyon")
+    bump_generation()
+    assert key != search_cache_key("developpeur web", "lyon", {"remote": "1"})
+
+
+@pytest.mark.django_db
+def test_repeated_search_is_served_from_cache_until_an_offer_changes(
+    client, cache_backend, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    user = User.objects.create(username="rh@acme.fr", email="rh@acme.fr", role=User.Role.COMPANY)
+    offer = Offer.objects.create(company=user, title="Stage python", location="Lyon", description="Stage")
+
+    client.get("/offres/", {"q": "python"})
+    # seules les cartes de la page sont relues
+    with django_assert_num_queries(1):
+        response = client.get("/offres/", {"q": "python"})
+    assert [card.offer_id for card in response.context["offers"]] == [offer.pk]
+    assert search_cache_stats()["hits"] == 1
+
+    offer.title = "Stage java"
+    with django_capture_on_commit_callbacks() as callbacks:
+        offer.save()
+    # la génération ne change qu'au commit
+    assert client.get("/offres/", {"q": "python"}).context["offers"][0].offer_id == offer.pk
+    for callback in callbacks:
+        callback()
+    response = client.get("/offres/", {"q": "python"})
+    assert response.context["offers"] == []
+    assert search_cache_stats()["misses"] == 2
+    assert search_cache_stats()["hits"] == 2
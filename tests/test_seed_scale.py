@@ -0,0 +1,33 @@
+import pytest
+from django.core.management import call_command
+
+from accounts.models import CompanyProfile, Offer, OfferCard, StudentInvitation, StudentProfile, User
+
+COUNTS = {"companies": 4, "institutions": 2, "students": 10, "invitations": 6, "offers": 25}
+
+
+@pytest.mark.django_db
+def test_seed_scale_loads_every_table_with_read_models():
+    call_command("seed_scale", seed=3, chunk_size=10, **COUNTS)
+    assert User.objects.count() == 16
+    assert CompanyProfile.objects.count() == 4
+    assert StudentProfile.objects.exclude(institution=None).count() == 10
+    assert StudentInvitation.objects.count() == 6
+    assert Offer.objects.count() == OfferCard.objects.count() == 25
+    assert not Offer.objects.filter(search_vector__isnull=True).exists()
+    # un seul hachage partagé par tous les comptes
+    assert User.objects.values("password").distinct().count() == 1
+    assert User.objects.first().check_password("mosifra")
+
+
+@pytest.mark.django_db
+def test_seed_scale_is_deterministic():
+    call_command("seed_scale", seed=5, **COUNTS)
+    fields = ("id", "title", "company_id", "created_at", "updated_at")
+    first = list(Offer.objects.order_by("id").values_list(*fields))
+    joined = list(User.objects.order_by("id").values_list("id", "date_joined"))
+    Offer.objects.all().delete()
+    User.objects.all().delete()
+    call_command("seed_scale", seed=5, **COUNTS)
+    assert list(Offer.objects.order_by("id").values_list(*fields)) == first
+    assert list(User.objects.order_by("id").values_list("id", "date_joined")) == joined
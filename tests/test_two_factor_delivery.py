@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.urls import reverse
+
+from accounts import mail as accounts_mail
+from accounts.mail import (
+    DELIVERY_FAILED,
+    DELIVERY_PENDING,
+    DELIVERY_SENT,
+    DELIVERY_UNKNOWN,
+    delivery_status,
+    send_in_background,
+)
+from accounts.models import User
+
+release = threading.Event()
+
+
+class GatedBackend(EmailBackend):
+    """Backend locmem qui attend `release` : un serveur SMTP lent."""
+
+    def send_messages(self, messages):
+        release.wait(5)
+        return super().send_messages(messages)
+
+
+def _reset_pool():
+    # le pool lit EMAIL_BACKGROUND_* à sa création
+    if accounts_mail._pool is not None:
+        accounts_mail._pool[0].shutdown(wait=True)
+        accounts_mail._pool = None
+
+
+@pytest.fixture
+def gated(settings):
+    settings.EMAIL_BACKEND = f"{GatedBackend.__module__}.GatedBackend"
+    release.clear()
+    _reset_pool()
+    yield
+    release.set()
+    _reset_pool()
+
+
+def _wait_for(delivery_id, status):
+    deadline = time.monotonic() + 5
+    while delivery_status(delivery_id) != status and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return delivery_status(delivery_id)
+
+
+@pytest.mark.django_db
+def test_login_redirects_before_the_code_is_sent(client, gated):
+    User.objects.create_user(username="lea", email="lea@etu.example", password="secret-pass")
+
+    response = client.post(reverse("accounts:login"), {"username": "lea@etu.example", "password": "secret-pass"})
+    assert response.status_code == 302
+    assert mail.outbox == []
+    assert "Envoi du code en cours" in client.get(reverse("accounts:two_factor")).content.decode()
+
+    release.set()
+    assert _wait_for(client.session["two_factor_delivery"], DELIVERY_SENT) == DELIVERY_SENT
+    assert client.session["two_factor_code"] in mail.outbox[0].body
+    assert "Code envoyé" in client.get(reverse("accounts:two_factor_status")).content.decode()
+
+
+def test_full_pool_fails_fast_instead_of_queuing(settings, gated):
+    settings.EMAIL_BACKGROUND_WORKERS = 1
+    settings.EMAIL_BACKGROUND_QUEUE = 0
+
+    first = send_in_background(EmailMessage("Code", "1", None, ["lea@etu.example"]))
+    second = send_in_background(EmailMessage("Code", "2", None, ["hugo@etu.example"]))
+
+    assert delivery_status(first) == DELIVERY_PENDING
+    assert delivery_status(second) == DELIVERY_FAILED
+    release.set()
+    assert _wait_for(first, DELIVERY_SENT) == DELIVERY_SENT
+
+
+def test_pending_state_expires_to_unknown_instead_of_spinning_forever(settings, gated):
+    # un processus tué avec le message en file ne le passera jamais à "envoyé"
+    settings.EMAIL_BACKGROUND_PENDING_TIMEOUT = 0
+    delivery_id = send_in_background(EmailMessage("Code", "1", None, ["lea@etu.example"]))
+
+    assert delivery_status(delivery_id) == DELIVERY_UNKNOWN
+    assert delivery_status(None) is None
+    release.set()
+    assert _wait_for(delivery_id, DELIVERY_SENT) == DELIVERY_SENT